@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Measure the overhead of the test helpers themselves, offline.
+
+The helpers run against a fake `docker` executable (``fake-docker/docker``)
+and a fake Docker API served on a Unix socket, so the figures only reflect the
+cost of the helpers: Python code, `docker` subprocesses and API requests.
+
+Usage:
+
+    python benchmarks/bench_helpers.py                  # compare to baseline.json
+    python benchmarks/bench_helpers.py --save-baseline  # record a new baseline
+
+Latencies depend on the machine: record the baseline on the machine comparing
+against it. Subprocess and API request counts do not.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent))
+
+CONTAINER_ID = 'fa4e0c0a7a1e'
+DEFAULT_BASELINE = BENCHMARKS_DIR / 'baseline.json'
+# A latency is reported as a regression above
+# baseline * LATENCY_TOLERANCE + LATENCY_SLACK_MS, the slack absorbing the
+# noise of sub-microsecond medians
+LATENCY_TOLERANCE = 1.5
+LATENCY_SLACK_MS = 0.05
+
+
+class FakeDockerAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests_count = 0
+
+    def do_GET(self) -> None:
+        FakeDockerAPIHandler.requests_count += 1
+        path = self.path.split('?')[0]
+        if path.endswith('/version'):
+            self._reply({'ApiVersion': '1.41', 'Version': '20.10.0'})
+        elif path.endswith(f'/containers/{CONTAINER_ID}/json'):
+            self._reply(
+                {
+                    'Id': CONTAINER_ID,
+                    'State': {'Running': True, 'Status': 'running'},
+                    'NetworkSettings': {
+                        'Ports': {
+                            '9497/tcp': [{'HostIp': '0.0.0.0', 'HostPort': '32768'}]
+                        }
+                    },
+                }
+            )
+        else:
+            self._reply({'message': 'not found'}, status=404)
+
+    def _reply(self, body: dict, status: int = 200) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def address_string(self) -> str:
+        return 'fake-docker'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeDockerAPI(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def start_fake_docker(tmp_dir: Path) -> tuple[FakeDockerAPI, Path]:
+    socket_path = tmp_dir / 'docker.sock'
+    server = FakeDockerAPI(str(socket_path), FakeDockerAPIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    call_log = tmp_dir / 'docker-calls.log'
+    os.environ['DOCKER_HOST'] = f'unix://{socket_path}'
+    os.environ['FAKE_DOCKER_LOG'] = str(call_log)
+    fake_cli_dir = BENCHMARKS_DIR / 'fake-docker'
+    os.environ['PATH'] = f'{fake_cli_dir}{os.pathsep}{os.environ["PATH"]}'
+    return server, call_log
+
+
+def count_lines(path: Path) -> int:
+    if not path.exists():
+        return 0
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def measure(
+    func: Callable[[], Any], iterations: int, call_log: Path
+) -> dict[str, float]:
+    func()  # warm-up
+    subprocesses = count_lines(call_log)
+    api_requests = FakeDockerAPIHandler.requests_count
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        'median_ms': statistics.median(durations) * 1000,
+        'p95_ms': durations[int(0.95 * (len(durations) - 1))] * 1000,
+        'subprocesses': (count_lines(call_log) - subprocesses) / iterations,
+        'api_requests': (FakeDockerAPIHandler.requests_count - api_requests)
+        / iterations,
+    }
+
+
+def build_benchmarks(
+    tmp_dir: Path,
+) -> dict[str, tuple[Callable[[], Any], int]]:
+    from wazo_test_helpers import pytest_asset, until
+    from wazo_test_helpers.asset_launching_test_case import AssetLaunchingTestCase
+
+    class Asset(AssetLaunchingTestCase):
+        service = 'service'
+        asset = 'bench'
+        assets_root = tmp_dir
+
+    def capture_logs() -> None:
+        with Asset.capture_logs() as logs:
+            pass
+        logs.result()
+
+    def item(marker: str, nodeid: str) -> SimpleNamespace:
+        usefixtures = SimpleNamespace(name='usefixtures', args=(marker,))
+        return SimpleNamespace(
+            parent=SimpleNamespace(own_markers=[usefixtures]),
+            user_properties=[],
+            nodeid=nodeid,
+        )
+
+    config = SimpleNamespace(
+        pluginmanager=SimpleNamespace(hasplugin=lambda name: False), cache=None
+    )
+    items = [item(f'asset_{i % 20}', f'test_{i}') for i in range(1000)]
+    same_asset = item('asset_0', 'test_0'), item('asset_0', 'test_1')
+
+    benchmarks: dict[str, tuple[Callable[[], Any], int]] = {
+        '_container_id': (lambda: Asset._container_id('service'), 50),
+        'docker_exec': (lambda: Asset.docker_exec(['true']), 50),
+        'service_port': (lambda: Asset.service_port(9497), 50),
+        'capture_logs': (capture_logs, 50),
+        'mark_logs_test_start': (lambda: Asset.mark_logs_test_start('bench'), 50),
+        'until.assert_': (lambda: until.assert_(lambda: None, timeout=1), 1000),
+        'pytest_asset.pytest_collection_modifyitems': (
+            lambda: pytest_asset.pytest_collection_modifyitems(
+                None, config, list(items)  # type: ignore[arg-type]
+            ),
+            200,
+        ),
+        'pytest_asset.pytest_runtest_setup': (
+            lambda: pytest_asset.pytest_runtest_setup(same_asset[0]),  # type: ignore
+            1000,
+        ),
+        'pytest_asset.pytest_runtest_teardown': (
+            lambda: pytest_asset.pytest_runtest_teardown(*same_asset),  # type: ignore
+            1000,
+        ),
+    }
+
+    try:
+        from kombu import Exchange
+
+        from wazo_test_helpers.bus import BusClient
+    except ImportError:
+        print('kombu is not installed: skipping BusMessageAccumulator.accumulate')
+    else:
+        bus = BusClient('memory://', Exchange('bench', type='topic'))
+        accumulator = bus.accumulator(routing_key='#')
+
+        def accumulate() -> None:
+            bus.publish({'name': 'event'}, routing_key='bench')
+            accumulator.accumulate()
+
+        benchmarks['BusMessageAccumulator.accumulate'] = (accumulate, 3)
+
+    return benchmarks
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict]) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for counter in ('subprocesses', 'api_requests'):
+            if result[counter] > reference[counter]:
+                regressions.append(
+                    f'{name}: {counter} {reference[counter]:g} -> {result[counter]:g}'
+                )
+        limit = reference['median_ms'] * LATENCY_TOLERANCE + LATENCY_SLACK_MS
+        if result['median_ms'] > limit:
+            regressions.append(
+                f'{name}: median {reference["median_ms"]:.3f}ms '
+                f'-> {result["median_ms"]:.3f}ms'
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--filter', default='', help='run matching benchmarks only')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, call_log = start_fake_docker(Path(tmp))
+        results = {}
+        print(f'{"benchmark":<45} {"median":>10} {"p95":>10} {"subproc":>8} {"api":>6}')
+        for name, (func, iterations) in build_benchmarks(Path(tmp)).items():
+            if args.filter not in name:
+                continue
+            result = measure(func, iterations, call_log)
+            results[name] = result
+            print(
+                f'{name:<45} {result["median_ms"]:>8.3f}ms {result["p95_ms"]:>8.3f}ms '
+                f'{result["subprocesses"]:>8g} {result["api_requests"]:>6g}'
+            )
+        server.shutdown()
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}, nothing to compare')
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text()))
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
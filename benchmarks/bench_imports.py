@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Check the import cost of each public module of wazo_test_helpers.
+
+Each module is imported in fresh interpreters with ``-X importtime``. A module
+importing one of the heavy third-party modules at load time, or getting slower
+than its baseline, is reported as a regression.
+
+Usage:
+
+    python benchmarks/bench_imports.py                  # compare to import_baseline.json
+    python benchmarks/bench_imports.py --save-baseline  # record a new baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARKS_DIR.parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / 'import_baseline.json'
+# An import time is reported as a regression above baseline * TOLERANCE + SLACK_US
+TOLERANCE = 1.5
+SLACK_US = 2000
+
+PUBLIC_MODULES = [
+    'wazo_test_helpers.asset_launching_test_case',
+    'wazo_test_helpers.async_until',
+    'wazo_test_helpers.auth',
+    'wazo_test_helpers.bus',
+    'wazo_test_helpers.db',
+    'wazo_test_helpers.filesystem',
+    'wazo_test_helpers.hamcrest',
+    'wazo_test_helpers.latency',
+    'wazo_test_helpers.mock',
+    'wazo_test_helpers.pytest_asset',
+    'wazo_test_helpers.shared_infrastructure',
+    'wazo_test_helpers.timing_history',
+    'wazo_test_helpers.until',
+    'wazo_test_helpers.wait_strategy',
+    'wazo_test_helpers.watchdog',
+]
+# Must only be imported on first use
+HEAVY_MODULES = ['docker', 'kombu', 'sqlalchemy', 'requests', 'hamcrest', 'asyncio']
+# Except by the modules made for them
+HEAVY_MODULES_USED = {'wazo_test_helpers.async_until': ['asyncio']}
+
+
+def import_cost(module: str) -> tuple[int, list[str]]:
+    """Return the cumulative import time (us) and the heavy modules loaded."""
+    script = (
+        f'import sys, {module}; '
+        f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    )
+    environment = dict(os.environ, PYTHONPATH=str(ROOT_DIR))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        capture_output=True,
+        text=True,
+        env=environment,
+        check=True,
+    )
+    cumulative = 0
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            cumulative = int(fields[1])
+    loaded = [name for name in completed.stdout.strip().split(',') if name]
+    return cumulative, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    regressions = []
+    for module in PUBLIC_MODULES:
+        costs = []
+        for _ in range(args.runs):
+            cost, loaded = import_cost(module)
+            costs.append(cost)
+        loaded = [
+            name for name in loaded if name not in HEAVY_MODULES_USED.get(module, [])
+        ]
+        median = int(statistics.median(costs))
+        results[module] = median
+        print(f'{module:<45} {median / 1000:>8.2f}ms  {",".join(loaded)}')
+        if loaded:
+            regressions.append(f'{module} imports {", ".join(loaded)} at load time')
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        print(f'Baseline saved to {args.baseline}')
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        for module, cost in results.items():
+            reference = baseline.get(module)
+            if reference is not None and cost > reference * TOLERANCE + SLACK_US:
+                regressions.append(
+                    f'{module}: {reference / 1000:.2f}ms -> {cost / 1000:.2f}ms'
+                )
+
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import importlib
+import types
+from typing import Any
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module, imported on first attribute access.
+
+    Heavy third-party modules (docker, kombu, sqlalchemy, requests) would
+    otherwise be imported at pytest collection, even by runs selecting no
+    integration test. Use it as:
+
+        if TYPE_CHECKING:
+            import requests
+        else:
+            requests = lazy_import('requests')
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return getattr(module, attribute)
+
+
+def lazy_import(name: str) -> Any:
+    return LazyModule(name)
@@ -0,0 +1,207 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Budgets and statistics shared by the `until` and `async_until` waits.
+
+The public functions are exposed by `until`; the others are for the wait
+loops of both modules: a wait runs within `recorded_wait` when `recording`,
+counts its attempts with `count_attempt` and its sleeps with `count_sleeping`,
+spaces its attempts with `lazy_delays` and reports running out of budget
+with `budget_message`.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, TypedDict
+
+if TYPE_CHECKING:
+    from .until import PollingPolicy
+
+# Deadlines of the enclosing `deadline` contexts, per thread and asyncio task
+_deadlines: contextvars.ContextVar[tuple[float, ...]] = contextvars.ContextVar(
+    'deadlines', default=()
+)
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[None]:
+    """Make the waits within share a budget of <seconds>.
+
+    The `until` functions stop trying when the budget runs out, even before
+    their own timeout or tries, so that sequential or nested waits (e.g. of a
+    `ComponentsWaitStrategy`) fail within the budget, not after the sum of
+    their timeouts. Nested contexts only shorten the budget. ``None`` sets no
+    budget.
+
+        with until.deadline(30):
+            until.assert_(event_received, timeout=20)
+            until.assert_(row_exists, timeout=20)  # gets what is left of 30s
+    """
+    if seconds is None:
+        yield
+        return
+    token = _deadlines.set((*_deadlines.get(), time.monotonic() + seconds))
+    try:
+        yield
+    finally:
+        _deadlines.reset(token)
+
+
+def remaining_budget() -> float | None:
+    """Return the seconds left to the innermost `deadline`, if any."""
+    deadlines = _deadlines.get()
+    if not deadlines:
+        return None
+    return min(deadlines) - time.monotonic()
+
+
+def budget_message(message: str | None) -> str | None:
+    """Return the <message> of a failed wait, telling if its budget ran out."""
+    budget = remaining_budget()
+    if budget is None or budget > 0:
+        return message
+    return f'{message}\nWait budget exhausted' if message else 'Wait budget exhausted'
+
+
+def lazy_delays(policy: PollingPolicy | None, interval: float) -> Iterator[float]:
+    """Yield the delays of <policy>, or of the default policy of `until`."""
+    # Most waits succeed at once: only look up the default policy when sleeping
+    from .until import default_policy
+
+    yield from (policy or default_policy()).delays(interval)
+
+
+class WaitStats(TypedDict):
+    calls: int
+    attempts: int
+    successes: int
+    timeouts: int
+    time_to_success: float  # total of the successful waits, in seconds
+    sleeping: float
+    total: float
+
+
+# Statistics of the waits by call site (file:line), when telemetry is enabled
+_telemetry: dict[str, WaitStats] = {}
+_telemetry_lock = threading.Lock()
+# Attempts and sleeping time of the running waits, per thread and asyncio task
+_running_waits: contextvars.ContextVar[
+    tuple[dict[str, Any], ...]
+] = contextvars.ContextVar('running_waits', default=())
+
+
+def _telemetry_from_environment() -> bool:
+    return os.getenv('WAZO_TEST_UNTIL_TELEMETRY', '') not in ('', '0')
+
+
+# Whether telemetry is enabled, read once: checked by every wait and attempt
+recording = _telemetry_from_environment()
+
+
+def enable_telemetry(enabled: bool | None = True) -> None:
+    """Record wait statistics by call site (``None``: from the environment)."""
+    global recording
+    recording = _telemetry_from_environment() if enabled is None else enabled
+
+
+def telemetry_enabled() -> bool:
+    return recording
+
+
+def telemetry() -> dict[str, WaitStats]:
+    """Return the statistics of the waits recorded so far, by call site."""
+    with _telemetry_lock:
+        return {
+            call_site: WaitStats(**stats) for call_site, stats in _telemetry.items()
+        }
+
+
+def reset_telemetry() -> None:
+    with _telemetry_lock:
+        _telemetry.clear()
+
+
+def count_attempt() -> None:
+    waits = _running_waits.get()
+    if waits:
+        waits[-1]['attempts'] += 1
+
+
+def count_sleeping(seconds: float) -> None:
+    waits = _running_waits.get()
+    if waits:
+        waits[-1]['sleeping'] += seconds
+
+
+@contextmanager
+def recorded_wait(
+    caller: Any, timeouts: tuple[type[BaseException], ...]
+) -> Iterator[None]:
+    """Record the wait running within, called from the <caller> frame.
+
+    The wait timed out if it raises one of <timeouts>.
+    """
+    call_site = _call_site(caller)
+    wait = {'attempts': 0, 'sleeping': 0.0}
+    token = _running_waits.set((*_running_waits.get(), wait))
+    start = time.monotonic()
+    outcome = None
+    try:
+        yield
+    except timeouts:
+        outcome = 'timeout'
+        raise
+    else:
+        outcome = 'success'
+    finally:
+        _running_waits.reset(token)
+        _record_wait(call_site, wait, time.monotonic() - start, outcome)
+
+
+def _call_site(frame: Any) -> str:
+    """Return the file:line of <frame>, or of its caller outside this package.
+
+    Waits of helpers like `BusMessageAccumulator` are attributed to the tests
+    calling them.
+    """
+    package_directory = os.path.dirname(__file__) + os.sep
+    caller = frame
+    while caller is not None and caller.f_code.co_filename.startswith(
+        package_directory
+    ):
+        caller = caller.f_back
+    caller = caller or frame
+    return f'{caller.f_code.co_filename}:{caller.f_lineno}'
+
+
+def _record_wait(
+    call_site: str, wait: dict[str, Any], duration: float, outcome: str | None
+) -> None:
+    with _telemetry_lock:
+        stats = _telemetry.setdefault(
+            call_site,
+            {
+                'calls': 0,
+                'attempts': 0,
+                'successes': 0,
+                'timeouts': 0,
+                'time_to_success': 0.0,
+                'sleeping': 0.0,
+                'total': 0.0,
+            },
+        )
+        stats['calls'] += 1
+        stats['attempts'] += wait['attempts']
+        stats['sleeping'] += wait['sleeping']
+        stats['total'] += duration
+        if outcome == 'success':
+            stats['successes'] += 1
+            stats['time_to_success'] += duration
+        elif outcome == 'timeout':
+            stats['timeouts'] += 1
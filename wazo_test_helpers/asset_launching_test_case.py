@@ -3,27 +3,51 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import os
 import random
+import re
+import shlex
+import shutil
 import string
 import subprocess
 import tempfile
+import threading
+import time
 import unittest
-from asyncio import Future
-from collections.abc import Callable, Generator, Iterator
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Generic, NoReturn, TextIO, TypeVar, cast
-
-import docker as docker_client
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Generic,
+    NoReturn,
+    TextIO,
+    TypedDict,
+    TypeVar,
+    cast,
+)
+
+from . import latency
+from ._lazy import lazy_import
+from .watchdog import ContainerWatchdog
 
 if TYPE_CHECKING:
+    from asyncio import Future
     from tempfile import _TemporaryFileWrapper
     from typing import ParamSpec
 
+    import docker as docker_client
+
+    from .shared_infrastructure import AbstractSharedInfrastructure
+
     P = ParamSpec('P')
+else:
+    docker_client = lazy_import('docker')
 
 
 ClassType = TypeVar("ClassType", bound=type[Any])
@@ -39,6 +63,16 @@ if os.environ.get('TEST_LOGS') != 'verbose':
     logging.getLogger('urllib3.connectionpool').setLevel(logging.WARNING)
     logger.setLevel(logging.WARNING)
 
+# Conditions applied by `set_network_conditions`, by project name
+_network_conditions: dict[str, set[tuple[str, int | None, str]]] = {}
+# Running profilers (file name, process, start time), by project name
+_profilers: dict[str, tuple[str, subprocess.Popen, float]] = {}
+
+# Watchdogs of launched assets, by project name
+_watchdogs: dict[str, ContainerWatchdog] = {}
+
+_PROFILE_EXTENSIONS = {'speedscope': 'json', 'flamegraph': 'svg', 'raw': 'txt'}
+
 
 class ClientCreateException(Exception):
     def __init__(self, client_name: str) -> None:
@@ -63,6 +97,11 @@ class NoSuchPort(Exception):
         super().__init__(f'For service {service_name}: No such port: {port}')
 
 
+class NoSuchReplica(Exception):
+    def __init__(self, service_name: str, replica: int) -> None:
+        super().__init__(f'For service {service_name}: No such replica: {replica}')
+
+
 class ContainerStartFailed(Exception):
     def __init__(self, stdout: str, stderr: str, return_code: int) -> None:
         message = (
@@ -88,6 +127,39 @@ class ContainerCommandFailed(Exception):
         super().__init__(message)
 
 
+class FanOutFailed(Exception):
+    def __init__(self, errors: dict[str, Exception]) -> None:
+        details = '\n'.join(f'{name}: {error!r}' for name, error in errors.items())
+        super().__init__(f'Failed for services {", ".join(errors)}:\n{details}')
+        self.errors = errors
+
+
+class FanOutResults(Generic[R]):
+    """Per-service outcome of an operation run on several services."""
+
+    def __init__(self) -> None:
+        self.results: dict[str, R] = {}
+        self.errors: dict[str, Exception] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def raise_for_errors(self) -> None:
+        if self.errors:
+            raise FanOutFailed(self.errors)
+
+
+# Services to fan out to: names, a predicate on names, or None for all of them
+ServiceSelector = Iterable[str] | Callable[[str], bool] | None
+
+
+class ResourceLimits(TypedDict, total=False):
+    cpus: float  # CPU quota, in number of CPUs, e.g. 0.5
+    memory: str  # Memory limit, swap included, e.g. '256m'
+    pids: int  # Maximum number of processes/threads
+
+
 class CachedClassProperty(Generic[ClassType, R]):
     __slots__ = ('_func', '_value')
 
@@ -110,6 +182,120 @@ class CachedClassProperty(Generic[ClassType, R]):
 cached_class_property = CachedClassProperty
 
 
+class ClientCache:
+    """Clients built from the services of launched assets.
+
+    Entries are keyed by asset class, so subclasses never share a client, and are
+    dropped when a service they depend on is restarted, stopped or relaunched.
+    Clients are built outside the cache lock, one at a time per entry, and not
+    kept if the cache was invalidated while building them.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[type, str], tuple[Any, frozenset[str] | None]] = {}
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._build_locks: dict[tuple[type, str], threading.Lock] = {}
+        self._invalidations = 0
+
+    def get(
+        self,
+        asset_class: type[AbstractAssetLaunchingHelper],
+        name: str,
+        services: frozenset[str] | None,
+        build: Callable[[], R],
+    ) -> R:
+        project_name = asset_class._project_name()
+        key = (asset_class, name)
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._hits[project_name] = self._hits.get(project_name, 0) + 1
+                    return cast(R, self._entries[key][0])
+                self._misses[project_name] = self._misses.get(project_name, 0) + 1
+                invalidations = self._invalidations
+            client = build()
+            with self._lock:
+                if self._invalidations == invalidations:
+                    self._entries[key] = (client, services)
+            return client
+
+    def invalidate(self, project_name: str, service_name: str | None = None) -> None:
+        """Drop the clients of a project depending on `service_name` (default: all)."""
+        with self._lock:
+            self._invalidations += 1
+            for key, (_, services) in list(self._entries.items()):
+                asset_class = cast(type[AbstractAssetLaunchingHelper], key[0])
+                if asset_class._project_name() != project_name:
+                    continue
+                if service_name is None or services is None or service_name in services:
+                    del self._entries[key]
+
+    def stats(self, project_name: str | None = None) -> dict[str, int]:
+        with self._lock:
+            if project_name is None:
+                return {
+                    'hits': sum(self._hits.values()),
+                    'misses': sum(self._misses.values()),
+                }
+            return {
+                'hits': self._hits.get(project_name, 0),
+                'misses': self._misses.get(project_name, 0),
+            }
+
+
+client_cache = ClientCache()
+
+
+class AssetCachedClient(Generic[ClassType, R]):
+    __slots__ = ('_func', '_name', '_services')
+
+    def __init__(
+        self, func: Callable[[ClassType], R], services: frozenset[str] | None = None
+    ) -> None:
+        self._func = func
+        self._name = func.__name__
+        self._services = services
+
+    def __set_name__(self, owner: ClassType, name: str) -> None:
+        self._name = name
+
+    def __get__(self, instance: object | None, owner: ClassType | None = None) -> R:
+        if owner is None:
+            owner = cast(ClassType, type(instance))
+        asset_class = owner
+        return client_cache.get(
+            asset_class, self._name, self._services, lambda: self._func(asset_class)
+        )
+
+
+def asset_cached_client(
+    *services: str,
+) -> Callable[[Callable[[ClassType], R]], AssetCachedClient[ClassType, R]]:
+    """
+    Cache a client built from an asset's services, once per launch of the asset.
+
+    Usage:
+    ```python
+    class MyAssetClass(AssetLaunchingTestCase):
+        @asset_cached_client('auth')
+        def auth(cls) -> AuthClient:
+            return AuthClient('127.0.0.1', cls.service_port(9497, 'auth'))
+    ```
+
+    The client is rebuilt after one of `services` (any service when none is
+    given) is restarted, stopped, started or scaled, or the asset relaunched.
+    """
+
+    def decorator(func: Callable[[ClassType], R]) -> AssetCachedClient[ClassType, R]:
+        return AssetCachedClient(func, frozenset(services) if services else None)
+
+    return decorator
+
+
 def get_container_management_enabled() -> bool:
     return os.environ.get('TEST_DOCKER', 'manage') != 'ignore'
 
@@ -140,13 +326,72 @@ class AbstractAssetLaunchingHelper:
     cur_dir: str | Path | None = None
     log_dir: str | Path | None = None
 
+    # Session-wide services (e.g. postgres, rabbitmq) this asset attaches to
+    # instead of starting its own. See `wazo_test_helpers.shared_infrastructure`.
+    shared_infrastructure: type[AbstractSharedInfrastructure] | None = None
+
+    # Number of containers to launch for some services, e.g. {'my-service': 3}
+    replicas: dict[str, int] | None = None
+
+    # Named sets of per-service resource limits, e.g.
+    # {'production': {'my-service': {'cpus': 1, 'memory': '512m', 'pids': 256}}}
+    resource_profiles: dict[str, dict[str, ResourceLimits]] | None = None
+    # Profile applied at launch. WAZO_TEST_RESOURCE_PROFILE takes precedence when
+    # it names one of `resource_profiles`.
+    resource_profile: str | None = None
+
+    # Image providing `tc`, run as a sidecar sharing the network namespace of the
+    # target container. When unset, `tc` is executed inside the target container.
+    network_conditions_image: str | None = None
+
+    # Image providing `py-spy`, run as a sidecar sharing the PID namespace of the
+    # service under test. When unset, `py-spy` is executed inside its container.
+    profiling_image: str | None = None
+    # PID of the profiled process in the container of the service under test
+    profiling_pid: int = 1
+
+    # Memory used by the asset's containers, e.g. '2g', counted against
+    # WAZO_TEST_ASSET_MEMORY_BUDGET when pytest_asset launches assets concurrently.
+    # Defaults to the memory limits of the active resource profile.
+    memory_requirement: str | None = None
+
+    # Run databases on tmpfs without durability and cap container logs, see
+    # `_performance_override`. Also enabled by WAZO_TEST_PERFORMANCE_OVERRIDE.
+    performance_override: bool = False
+    # Services running postgres or rabbitmq, besides the official images. Their data
+    # directory is mounted on tmpfs: it must not contain data shipped by the image.
+    # postgres options are only added to the `command` of the compose file, if set.
+    postgres_services: tuple[str, ...] = ()
+    rabbitmq_services: tuple[str, ...] = ()
+
+    # Services whose unexpected death is reported by the watchdog (enabled with
+    # WAZO_TEST_WATCHDOG). Defaults to `service`.
+    watched_services: list[str] | None = None
+
+    # Total seconds the `until` waits of each test may take (see `until.deadline`),
+    # applied by pytest_asset unless the test has a `wait_budget` marker.
+    wait_budget: float | None = None
+
     @classmethod
     @require_container_management
     def launch_service_with_asset(cls) -> None:
+        client_cache.invalidate(cls._project_name())
+        if cls.shared_infrastructure:
+            cls.shared_infrastructure.ensure_launched()
+        cls._write_generated_files()
+        profile = cls.active_resource_profile()
+        if profile:
+            logger.info('Launching %s with resource profile %s', cls.__name__, profile)
+
         logger.debug('Removing containers...')
         cls.rm_containers()
         logger.debug('Done.')
 
+        if cls.shared_infrastructure:
+            logger.debug('Provisioning shared infrastructure...')
+            cls.shared_infrastructure.provision(cls._project_name())
+            logger.debug('Done.')
+
         if os.getenv('WAZO_TEST_NO_DOCKER_COMPOSE_PULL') == '1':
             logger.debug('Not Pulling containers.')
         else:
@@ -163,6 +408,9 @@ class AbstractAssetLaunchingHelper:
             raise
         logger.debug('Done.')
 
+        if cls._watchdog_mode():
+            cls.start_watchdog()
+
     @classmethod
     def rm_containers(cls) -> None:
         _run_cmd(
@@ -274,25 +522,48 @@ class AbstractAssetLaunchingHelper:
         )
 
     @classmethod
-    def service_status(cls, service_name: str | None = None) -> dict:
+    def service_status(
+        cls, service_name: str | None = None, replica: int | None = None
+    ) -> dict:
         if not service_name:
             service_name = cls.service
         docker = docker_client.from_env().api
-        return docker.inspect_container(cls._container_id(service_name))
+        return docker.inspect_container(cls._container_id(service_name, replica))
+
+    @classmethod
+    def service_status_replicas(
+        cls, service_name: str | None = None
+    ) -> dict[int, dict]:
+        return {
+            replica: cls.service_status(service_name, replica=replica)
+            for replica in cls.service_replicas(service_name)
+        }
 
     @classmethod
     def service_logs(
-        cls, service_name: str | None = None, since: str | None = None
+        cls,
+        service_name: str | None = None,
+        since: str | None = None,
+        replica: int | None = None,
     ) -> str:
         if not service_name:
             service_name = cls.service
 
-        cmd = ['docker', 'logs', cls._container_id(service_name)]
+        cmd = ['docker', 'logs', cls._container_id(service_name, replica)]
         if since is not None:
             cmd.append(f'--since={since}')
         status = _run_cmd(cmd).stdout
         return status.decode('utf-8')
 
+    @classmethod
+    def service_logs_replicas(
+        cls, service_name: str | None = None, since: str | None = None
+    ) -> dict[int, str]:
+        return {
+            replica: cls.service_logs(service_name, since=since, replica=replica)
+            for replica in cls.service_replicas(service_name)
+        }
+
     @classmethod
     @contextmanager
     def capture_logs(cls, service_name: str | None = None) -> Iterator[Future]:
@@ -302,6 +573,8 @@ class AbstractAssetLaunchingHelper:
             client.token.new(expiration=1)
         assert 'login' in logs.result()
         '''
+        from asyncio import Future
+
         time_start = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
         result: Future = Future()
         try:
@@ -342,12 +615,17 @@ class AbstractAssetLaunchingHelper:
             raise ContainerCommandFailed(command, service_name, return_code)
 
     @classmethod
-    def service_port(cls, internal_port: int, service_name: str | None = None) -> int:
+    def service_port(
+        cls,
+        internal_port: int,
+        service_name: str | None = None,
+        replica: int | None = None,
+    ) -> int:
         if not service_name:
             service_name = cls.service
 
         docker = docker_client.from_env().api
-        result = docker.port(cls._container_id(service_name), internal_port)
+        result = docker.port(cls._container_id(service_name, replica), internal_port)
 
         if not result:
             raise NoSuchPort(service_name, internal_port)
@@ -357,34 +635,151 @@ class AbstractAssetLaunchingHelper:
         # resolve to an IPv6 address that would not match with this port.
         return int(result[0]['HostPort'])
 
+    @classmethod
+    def service_port_replicas(
+        cls, internal_port: int, service_name: str | None = None
+    ) -> dict[int, int]:
+        return {
+            replica: cls.service_port(internal_port, service_name, replica=replica)
+            for replica in cls.service_replicas(service_name)
+        }
+
     @classmethod
     @require_container_management
     def stop_service_with_asset(cls) -> None:
+        client_cache.invalidate(cls._project_name())
+        cls.stop_watchdog()
+        cls.clear_all_network_conditions()
         cls.stop_services()
         cls._maybe_dump_docker_logs()
         cls._maybe_collect_coverage()
         cls.rm_networks()
+        if cls.shared_infrastructure:
+            cls.shared_infrastructure.release(cls._project_name())
         logger.debug('Done.')
 
     @classmethod
     def restart_service(
-        cls, service_name: str | None = None, signal: str | int | None = None
+        cls,
+        service_name: str | None = None,
+        signal: str | int | None = None,
+        replica: int | None = None,
     ) -> None:
         docker = docker_client.from_env().api
-        container_id = cls._container_id(service_name or cls.service)
+        container_id = cls._container_id(service_name or cls.service, replica)
         if signal:
             docker.kill(container_id, signal=signal)
         docker.restart(container_id)
+        # after: clients built during the restart would use the old port
+        client_cache.invalidate(cls._project_name(), service_name or cls.service)
+
+    @classmethod
+    def restart_service_replicas(
+        cls, service_name: str | None = None, signal: str | int | None = None
+    ) -> None:
+        for replica in cls.service_replicas(service_name):
+            cls.restart_service(service_name, signal=signal, replica=replica)
+
+    @classmethod
+    @require_container_management
+    def scale_service(cls, replicas: int, service_name: str | None = None) -> None:
+        """Add or remove replicas of an already launched service."""
+        service_name = service_name or cls.service
+        watchdog = _watchdogs.get(cls._project_name())
+        if watchdog:
+            # docker compose removes the replicas with the highest numbers
+            for replica in cls.service_replicas(service_name)[replicas:]:
+                watchdog.expect_stop(cls._replica_container_id(service_name, replica))
+        completed_process = _run_cmd(
+            ['docker', 'compose']
+            + cls._docker_compose_options()
+            + [
+                'up',
+                '--detach',
+                '--no-deps',
+                '--scale',
+                f'{service_name}={replicas}',
+                service_name,
+            ]
+        )
+        client_cache.invalidate(cls._project_name(), service_name)
+        if completed_process.returncode != 0:
+            command = ['scale', f'{service_name}={replicas}']
+            raise ContainerCommandFailed(
+                command, service_name, completed_process.returncode
+            )
 
     @classmethod
     def stop_service(cls, service_name: str | None = None, timeout: int = 10) -> None:
         docker = docker_client.from_env(timeout=timeout).api
-        docker.stop(cls._container_id(service_name or cls.service))
+        container_id = cls._container_id(service_name or cls.service)
+        client_cache.invalidate(cls._project_name(), service_name or cls.service)
+        watchdog = _watchdogs.get(cls._project_name())
+        if watchdog:
+            watchdog.expect_stop(container_id)
+        docker.stop(container_id)
 
     @classmethod
     def start_service(cls, service_name: str | None = None) -> None:
         docker = docker_client.from_env().api
-        docker.start(cls._container_id(service_name or cls.service))
+        container_id = cls._container_id(service_name or cls.service)
+        docker.start(container_id)
+        client_cache.invalidate(cls._project_name(), service_name or cls.service)
+        watchdog = _watchdogs.get(cls._project_name())
+        if watchdog:
+            watchdog.forget(container_id)
+
+    @classmethod
+    def start_watchdog(cls) -> None:
+        cls.stop_watchdog()
+        watchdog = ContainerWatchdog(
+            cls._project_name(), cls.watched_services or [cls.service]
+        )
+        watchdog.start()
+        _watchdogs[cls._project_name()] = watchdog
+
+    @classmethod
+    def stop_watchdog(cls) -> None:
+        watchdog = _watchdogs.pop(cls._project_name(), None)
+        if watchdog:
+            watchdog.stop()
+
+    @classmethod
+    def watchdog_failure(cls) -> str | None:
+        """Describe a watched container that died and is still down, if any."""
+        watchdog = _watchdogs.get(cls._project_name())
+        crashes = watchdog.crashes() if watchdog else {}
+        if not watchdog or not crashes:
+            return None
+
+        docker = docker_client.from_env().api
+        for container_id, crash in crashes.items():
+            try:
+                running = docker.inspect_container(container_id)['State']['Running']
+            except docker_client.errors.NotFound:
+                # removed on purpose, e.g. by scale_service or a teardown
+                watchdog.forget(container_id)
+                continue
+            if running:
+                # restarted since, e.g. by restart_service or a restart policy
+                watchdog.forget(container_id)
+                continue
+
+            reason = 'OOM killed' if crash['oom_killed'] else 'died'
+            logs = _run_cmd(
+                ['docker', 'logs', '--tail', '20', container_id]
+            ).stdout.decode('utf-8', errors='replace')
+            return (
+                f'Service {crash["service"]} {reason} '
+                f'(exit code {crash["exit_code"]}). Last log lines:\n{logs}'
+            )
+        return None
+
+    @staticmethod
+    def _watchdog_mode() -> str | None:
+        """`fail` or `skip` the tests following a crash, or None when disabled."""
+        mode = os.getenv('WAZO_TEST_WATCHDOG')
+        return mode if mode in ('fail', 'skip') else None
 
     @classmethod
     def pause_service(cls, service_name: str | None = None) -> None:
@@ -403,6 +798,7 @@ class AbstractAssetLaunchingHelper:
         service_name: str | None = None,
         return_attr: str = 'stdout',
         privileged: bool = False,
+        replica: int | None = None,
     ) -> str | int | list[str]:
         if not service_name:
             service_name = cls.service
@@ -411,10 +807,241 @@ class AbstractAssetLaunchingHelper:
         if privileged:
             docker_command.append('--privileged')
 
-        docker_command += [cls._container_id(service_name or cls.service)] + command
+        docker_command += [cls._container_id(service_name, replica)] + command
         result = _run_cmd(docker_command)
         return getattr(result, return_attr)
 
+    @classmethod
+    def docker_exec_replicas(
+        cls,
+        command: list[str],
+        service_name: str | None = None,
+        return_attr: str = 'stdout',
+        privileged: bool = False,
+    ) -> dict[int, str | int | list[str]]:
+        return {
+            replica: cls.docker_exec(
+                command, service_name, return_attr, privileged, replica=replica
+            )
+            for replica in cls.service_replicas(service_name)
+        }
+
+    @classmethod
+    def fan_out(
+        cls,
+        operation: Callable[[str], R],
+        services: ServiceSelector = None,
+        max_workers: int | None = None,
+    ) -> FanOutResults[R]:
+        """Run `operation(service_name)` concurrently for the selected services.
+
+        Usage:
+        results = cls.fan_out_restart(lambda name: name != 'postgres')
+        results.raise_for_errors()
+        """
+        service_names = cls._select_services(services)
+        fan_out_results: FanOutResults[R] = FanOutResults()
+        if not service_names:
+            return fan_out_results
+        with ThreadPoolExecutor(
+            max_workers=max_workers or len(service_names),
+            thread_name_prefix=f'{cls._project_name()}-fan-out',
+        ) as executor:
+            futures = {name: executor.submit(operation, name) for name in service_names}
+        for name, future in futures.items():
+            error = future.exception()
+            if error is None:
+                fan_out_results.results[name] = future.result()
+            elif isinstance(error, Exception):
+                fan_out_results.errors[name] = error
+            else:
+                raise error
+        return fan_out_results
+
+    @classmethod
+    def fan_out_restart(
+        cls,
+        services: ServiceSelector = None,
+        signal: str | int | None = None,
+        max_workers: int | None = None,
+    ) -> FanOutResults[None]:
+        return cls.fan_out(
+            lambda name: cls.restart_service(name, signal=signal), services, max_workers
+        )
+
+    @classmethod
+    def fan_out_stop(
+        cls,
+        services: ServiceSelector = None,
+        timeout: int = 10,
+        max_workers: int | None = None,
+    ) -> FanOutResults[None]:
+        return cls.fan_out(
+            lambda name: cls.stop_service(name, timeout=timeout), services, max_workers
+        )
+
+    @classmethod
+    def fan_out_logs(
+        cls,
+        services: ServiceSelector = None,
+        since: str | None = None,
+        max_workers: int | None = None,
+    ) -> FanOutResults[str]:
+        return cls.fan_out(
+            lambda name: cls.service_logs(name, since=since), services, max_workers
+        )
+
+    @classmethod
+    def fan_out_status(
+        cls, services: ServiceSelector = None, max_workers: int | None = None
+    ) -> FanOutResults[dict]:
+        return cls.fan_out(cls.service_status, services, max_workers)
+
+    @classmethod
+    def fan_out_docker_exec(
+        cls,
+        command: list[str],
+        services: ServiceSelector = None,
+        return_attr: str = 'stdout',
+        privileged: bool = False,
+        max_workers: int | None = None,
+    ) -> FanOutResults[str | int | list[str]]:
+        return cls.fan_out(
+            lambda name: cls.docker_exec(command, name, return_attr, privileged),
+            services,
+            max_workers,
+        )
+
+    @classmethod
+    def _select_services(cls, services: ServiceSelector) -> list[str]:
+        if isinstance(services, str):
+            return [services]
+        if services is not None and not callable(services):
+            return list(services)
+        result = _run_cmd(
+            ['docker', 'compose']
+            + cls._docker_compose_options()
+            + ['ps', '--all', '--services'],
+            stderr=False,
+        )
+        names = result.stdout.decode('utf-8').split()
+        if services is None:
+            return names
+        return [name for name in names if services(name)]
+
+    @classmethod
+    def set_network_conditions(
+        cls,
+        service_name: str | None = None,
+        *,
+        delay: float | None = None,
+        jitter: float | None = None,
+        loss: float | None = None,
+        rate: str | None = None,
+        interface: str = 'eth0',
+        replica: int | None = None,
+    ) -> None:
+        """Degrade the network of a service with netem.
+
+        Arguments:
+
+            - delay: latency added to outgoing packets, in milliseconds
+            - jitter: random variation of the delay, in milliseconds
+            - loss: percentage of outgoing packets dropped
+            - rate: bandwidth limit, e.g. '1mbit'
+        """
+        service_name = service_name or cls.service
+        netem = []
+        if delay is not None:
+            netem += ['delay', f'{delay}ms']
+            if jitter is not None:
+                netem.append(f'{jitter}ms')
+        elif jitter is not None:
+            raise ValueError('jitter requires a delay')
+        if loss is not None:
+            netem += ['loss', f'{loss}%']
+        if rate is not None:
+            netem += ['rate', rate]
+        if not netem:
+            raise ValueError('At least one network condition is required')
+
+        command = ['tc', 'qdisc', 'replace', 'dev', interface, 'root', 'netem']
+        return_code = cls._run_tc(command + netem, service_name, replica)
+        if return_code:
+            raise ContainerCommandFailed(command + netem, service_name, return_code)
+        _network_conditions.setdefault(cls._project_name(), set()).add(
+            (service_name, replica, interface)
+        )
+
+    @classmethod
+    def clear_network_conditions(
+        cls,
+        service_name: str | None = None,
+        interface: str = 'eth0',
+        replica: int | None = None,
+    ) -> None:
+        service_name = service_name or cls.service
+        command = ['tc', 'qdisc', 'del', 'dev', interface, 'root']
+        # Fails when no condition is applied, which is what we want anyway
+        cls._run_tc(command, service_name, replica)
+        _network_conditions.get(cls._project_name(), set()).discard(
+            (service_name, replica, interface)
+        )
+
+    @classmethod
+    def clear_all_network_conditions(cls) -> None:
+        applied = _network_conditions.pop(cls._project_name(), set())
+        for service_name, replica, interface in applied:
+            try:
+                cls.clear_network_conditions(service_name, interface, replica)
+            except Exception as e:
+                logger.debug('Could not clear network of %s: %s', service_name, e)
+
+    @classmethod
+    @contextmanager
+    def network_conditions(
+        cls, service_name: str | None = None, **conditions: Any
+    ) -> Iterator[None]:
+        '''
+        Usage:
+        with self.network_conditions('auth', delay=50, jitter=10, loss=1):
+            client.token.new(expiration=1)
+        '''
+        cls.set_network_conditions(service_name, **conditions)
+        try:
+            yield
+        finally:
+            cls.clear_network_conditions(
+                service_name,
+                conditions.get('interface', 'eth0'),
+                conditions.get('replica'),
+            )
+
+    @classmethod
+    def _run_tc(cls, command: list[str], service_name: str, replica: int | None) -> int:
+        if not cls.network_conditions_image:
+            return_code = cls.docker_exec(
+                command,
+                service_name,
+                return_attr='returncode',
+                privileged=True,
+                replica=replica,
+            )
+            return int(cast(int, return_code))
+
+        container_id = cls._container_id(service_name, replica)
+        docker_command = [
+            'docker',
+            'run',
+            '--rm',
+            '--network',
+            f'container:{container_id}',
+            '--cap-add',
+            'NET_ADMIN',
+            cls.network_conditions_image,
+        ]
+        return _run_cmd(docker_command + command).returncode
+
     @classmethod
     def docker_copy_to_container(
         cls, src: str, dst: str, service_name: str | None = None
@@ -449,25 +1076,66 @@ class AbstractAssetLaunchingHelper:
         _run_cmd(cmd.split(' '))
 
     @classmethod
-    def _container_id(cls, service_name: str) -> str:
+    def service_replicas(cls, service_name: str | None = None) -> list[int]:
+        """Return the replica numbers of a service's containers, in order."""
+        result = _run_cmd(
+            ['docker', 'ps', '--all']
+            + cls._service_filters(service_name or cls.service)
+            + ['--format', '{{.Label "com.docker.compose.container-number"}}'],
+            stderr=False,
+        )
+        return sorted(int(number) for number in result.stdout.decode('utf-8').split())
+
+    @classmethod
+    def _service_filters(cls, service_name: str) -> list[str]:
+        return [
+            '--filter',
+            f'label=com.docker.compose.project={cls._project_name()}',
+            '--filter',
+            f'label=com.docker.compose.service={service_name}',
+        ]
+
+    @classmethod
+    def _container_id(cls, service_name: str, replica: int | None = None) -> str:
+        if replica is not None:
+            return cls._replica_container_id(service_name, replica)
+        container_ids = cls._container_ids(service_name)
+        if len(container_ids) > 1:
+            raise AssertionError(
+                f'There is more than one container running with name {service_name}, '
+                'use the `replica` argument or the `*_replicas` variants'
+            )
+        return container_ids[0]
+
+    @classmethod
+    def _container_ids(cls, service_name: str) -> list[str]:
+        """Return the ids of all the containers of a service, one per replica."""
         result = _run_cmd(
             ['docker', 'compose']
             + cls._docker_compose_options()
             + ['ps', '-aq', service_name],
             stderr=False,
         ).stdout.strip()
-        result = result.decode('utf-8')
-        if '\n' in result:
-            raise AssertionError(
-                f'There is more than one container running with name {service_name}'
-            )
-        if not result:
+        container_ids = result.decode('utf-8').split()
+        if not container_ids:
             raise NoSuchService(service_name)
-        return result
+        return container_ids
+
+    @classmethod
+    def _replica_container_id(cls, service_name: str, replica: int) -> str:
+        result = _run_cmd(
+            ['docker', 'ps', '--all', '--quiet']
+            + cls._service_filters(service_name)
+            + ['--filter', f'label=com.docker.compose.container-number={replica}'],
+            stderr=False,
+        ).stdout.strip()
+        if not result:
+            raise NoSuchReplica(service_name, replica)
+        return str(result.decode('utf-8'))
 
     @classmethod
     def _project_name(cls) -> str:
-        return (cls.project_name or cls.service) + '_' + cls.asset
+        return (cls.project_name or cls.service) + '_' + cls.asset + project_suffix()
 
     @classmethod
     def _docker_compose_options(cls) -> list[str]:
@@ -482,11 +1150,167 @@ class AbstractAssetLaunchingHelper:
             '--file',
             str(root_dir / f'docker-compose.{cls.asset}.override.yml'),
         ]
+        generated_dir = generated_files_directory(cls._project_name())
+        if generated_dir.is_dir():
+            for override in sorted(generated_dir.glob('docker-compose.*.yml')):
+                options.extend(['--file', str(override)])
+            env_file = generated_dir / 'compose.env'
+            if env_file.exists():
+                # --env-file replaces the project's .env, keep reading it first
+                if (root_dir / '.env').exists():
+                    options.extend(['--env-file', str(root_dir / '.env')])
+                options.extend(['--env-file', str(env_file)])
         extra = os.getenv("WAZO_TEST_DOCKER_OVERRIDE_EXTRA")
         if extra:
             options.extend(["--file", extra])
         return options
 
+    @classmethod
+    def memory_estimate(cls) -> int | None:
+        """Return the memory needed by the asset, in bytes, if known."""
+        if cls.memory_requirement:
+            return parse_memory(cls.memory_requirement)
+        profile = cls.active_resource_profile()
+        if not profile or not cls.resource_profiles:
+            return None
+        limits = cls.resource_profiles[profile].values()
+        memories = [
+            parse_memory(limit['memory']) for limit in limits if 'memory' in limit
+        ]
+        return sum(memories) if memories else None
+
+    @classmethod
+    def active_resource_profile(cls) -> str | None:
+        for profile in (os.getenv('WAZO_TEST_RESOURCE_PROFILE'), cls.resource_profile):
+            if profile and profile in (cls.resource_profiles or {}):
+                return profile
+        return None
+
+    @classmethod
+    def _compose_overrides(cls) -> dict[str, dict]:
+        """Compose overrides generated at launch, keyed by a short name."""
+        overrides: dict[str, dict] = {}
+        if cls.replicas:
+            overrides['replicas'] = {
+                'services': {
+                    service: {'deploy': {'replicas': count}}
+                    for service, count in cls.replicas.items()
+                }
+            }
+        profile = cls.active_resource_profile()
+        if profile and cls.resource_profiles:
+            overrides['resources'] = {
+                'services': {
+                    service: _resource_limits_override(limits)
+                    for service, limits in cls.resource_profiles[profile].items()
+                }
+            }
+        if cls.shared_infrastructure or cls._is_performance_override_enabled():
+            services = cls._compose_services()
+            if cls.shared_infrastructure:
+                overrides['shared'] = cls.shared_infrastructure.asset_override(
+                    list(services)
+                )
+            if cls._is_performance_override_enabled():
+                overrides['performance'] = cls._performance_override(services)
+        return overrides
+
+    @classmethod
+    def _performance_override(cls, services: dict[str, dict]) -> dict:
+        """Trade durability for speed: nothing here must survive the asset.
+
+        - postgres and rabbitmq data directories are mounted on tmpfs;
+        - postgres runs without fsync, synchronous commits and full page writes;
+        - container logs are capped so `docker logs` stays fast.
+        """
+        override: dict[str, dict] = {}
+        for name, service in services.items():
+            service_override: dict[str, Any] = {}
+            image = service.get('image', '')
+            if name in cls.postgres_services or _is_postgres_image(image):
+                environment = service.get('environment') or {}
+                data_dir = environment.get('PGDATA', '/var/lib/postgresql/data')
+                command = service.get('command')
+                if isinstance(command, str):
+                    command = shlex.split(command)
+                if not command and _is_postgres_image(image):
+                    command = ['postgres']  # the CMD of the official image
+                if command:
+                    service_override['command'] = command + [
+                        '-c',
+                        'fsync=off',
+                        '-c',
+                        'synchronous_commit=off',
+                        '-c',
+                        'full_page_writes=off',
+                    ]
+            elif name in cls.rabbitmq_services or _is_rabbitmq_image(image):
+                data_dir = '/var/lib/rabbitmq'
+            else:
+                data_dir = None
+
+            mounted = {volume.get('target') for volume in service.get('volumes', [])}
+            if data_dir and data_dir not in mounted:
+                service_override['tmpfs'] = [data_dir]
+            if 'logging' not in service:
+                service_override['logging'] = {
+                    'driver': 'local',
+                    'options': {'max-size': '10m', 'max-file': '1'},
+                }
+            if service_override:
+                override[name] = service_override
+        return {'services': override}
+
+    @classmethod
+    def _compose_environment(cls) -> dict[str, str]:
+        """Variables generated at launch for interpolation in compose files."""
+        environment: dict[str, str] = {}
+        if cls.shared_infrastructure:
+            environment.update(
+                cls.shared_infrastructure.asset_environment(cls._project_name())
+            )
+        return environment
+
+    @classmethod
+    def _write_generated_files(cls) -> None:
+        generated_dir = generated_files_directory(cls._project_name())
+        shutil.rmtree(generated_dir, ignore_errors=True)
+        overrides = cls._compose_overrides()
+        environment = cls._compose_environment()
+        if not overrides and not environment:
+            return
+
+        generated_dir.mkdir(parents=True)
+        for name, override in overrides.items():
+            path = generated_dir / f'docker-compose.{name}.yml'
+            # JSON is valid YAML, no need for an extra dependency
+            path.write_text(json.dumps(override, indent=2))
+            logger.debug('Generated compose override %s', path)
+        if environment:
+            lines = [f'{key}={value}' for key, value in environment.items()]
+            (generated_dir / 'compose.env').write_text('\n'.join(lines) + '\n')
+
+    @classmethod
+    def _compose_services(cls) -> dict[str, dict]:
+        """Return the services of the asset's compose files, by name."""
+        root_dir = Path(cls.assets_root)
+        result = _run_cmd(
+            [
+                'docker',
+                'compose',
+                '--file',
+                str(root_dir / 'docker-compose.yml'),
+                '--file',
+                str(root_dir / f'docker-compose.{cls.asset}.override.yml'),
+                'config',
+                '--format',
+                'json',
+            ],
+            stderr=False,
+        )
+        config = json.loads(result.stdout.decode('utf-8') or '{}')
+        return dict(config.get('services', {}))
+
     @classmethod
     def _maybe_dump_docker_logs(cls) -> None:
         if os.getenv('WAZO_TEST_DOCKER_LOGS_ENABLED', '0') == '1':
@@ -511,22 +1335,162 @@ class AbstractAssetLaunchingHelper:
     @classmethod
     def mark_logs_test_start(cls, test_name: str) -> None:
         cls._mark_logs(f'TEST START: {test_name}')
+        if cls._is_profiling_enabled():
+            cls.start_profiling(test_name)
 
     @classmethod
     def mark_logs_test_end(cls, test_name: str) -> None:
+        if cls._is_profiling_enabled():
+            cls.stop_profiling()
         cls._mark_logs(f'TEST END: {test_name}')
 
     @classmethod
-    def _mark_logs(cls, marker: str) -> None:
-        cls.docker_exec(
-            [
-                '/bin/bash',
-                '-c',
-                '(date +"%F %T.%N " | tr -d "\n" &&'
-                f'echo ============= {marker} ================= ) &> /proc/1/fd/1',
-            ],
-            privileged=True,
+    def measure_latency(
+        cls,
+        func: Callable[[], Any],
+        name: str | None = None,
+        iterations: int = 100,
+        warmup: int = 10,
+        service_name: str | None = None,
+        **budgets: float,
+    ) -> latency.Latency:
+        """Measure the latency of repeated calls of `func` against a service.
+
+        Raise `LatencyBudgetExceeded` when a percentile is above its budget, in
+        seconds, e.g. `measure_latency(lambda: client.status(), p95=0.05)`. The
+        measurement is recorded for `service_name` (defaults to `service`) so
+        pytest_asset keeps its baseline in the timing history.
+        """
+        service_name = service_name or cls.service
+        name = name or str(getattr(func, '__qualname__', repr(func)))
+        result = latency.measure(func, iterations, warmup)
+        latency.measurements.append(
+            {
+                'asset': cls.asset,
+                'service': service_name,
+                'name': name,
+                'latency': result,
+            }
+        )
+        latency.assert_budget(name, result, **budgets)
+        return result
+
+    @classmethod
+    def start_profiling(cls, test_name: str) -> None:
+        """Start sampling the service under test until `stop_profiling`."""
+        cls.stop_profiling()
+        profile_format = os.getenv('WAZO_TEST_PROFILING_FORMAT', 'speedscope')
+        if profile_format not in _PROFILE_EXTENSIONS:
+            raise ValueError(
+                f'Unknown WAZO_TEST_PROFILING_FORMAT {profile_format!r}, '
+                f'supported formats: {", ".join(sorted(_PROFILE_EXTENSIONS))}'
+            )
+        extension = _PROFILE_EXTENSIONS[profile_format]
+        safe_test_name = re.sub(r'[^\w.-]', '_', test_name)
+        file_name = f'{cls.__module__}.{safe_test_name}.{extension}'
+        container_id = cls._container_id(cls.service)
+
+        if cls.profiling_image:
+            output_dir = '/profiles'
+            docker_command = [
+                'docker',
+                'run',
+                '--rm',
+                '--name',
+                cls._profiler_name(),
+                '--pid',
+                f'container:{container_id}',
+                '--cap-add',
+                'SYS_PTRACE',
+                '--volume',
+                f'{cls.get_log_directory()}:{output_dir}',
+                cls.profiling_image,
+            ]
+        else:
+            output_dir = '/tmp'
+            docker_command = ['docker', 'exec', '--privileged', container_id]
+        docker_command += [
+            'py-spy',
+            'record',
+            '--pid',
+            str(cls.profiling_pid),
+            '--subprocesses',
+            '--nonblocking',
+            '--format',
+            profile_format,
+            '--output',
+            f'{output_dir}/{file_name}',
+        ]
+        logger.debug('%s', docker_command)
+        process = subprocess.Popen(
+            docker_command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        _profilers[cls._project_name()] = (file_name, process, time.monotonic())
+
+    @classmethod
+    def stop_profiling(cls) -> str | None:
+        """Stop the running profiler, returning the path of the profile kept.
+
+        Profiles of tests shorter than WAZO_TEST_PROFILING_MIN_DURATION seconds
+        are discarded.
+        """
+        profiler = _profilers.pop(cls._project_name(), None)
+        if not profiler:
+            return None
+        file_name, process, start_time = profiler
+        duration = time.monotonic() - start_time
+
+        # py-spy writes its output when interrupted
+        if cls.profiling_image:
+            _run_cmd(['docker', 'kill', '--signal', 'SIGINT', cls._profiler_name()])
+        else:
+            cls.docker_exec(['pkill', '-INT', '-f', 'py-spy record'], privileged=True)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            logger.warning('Profiler of %s did not stop, no profile saved', file_name)
+            return None
+
+        min_duration = float(os.getenv('WAZO_TEST_PROFILING_MIN_DURATION', '0'))
+        keep = duration >= min_duration
+        local_path = os.path.join(cls.get_log_directory(), file_name)
+        if cls.profiling_image:
+            if not keep and os.path.exists(local_path):
+                os.unlink(local_path)
+        else:
+            container_path = f'/tmp/{file_name}'
+            if keep:
+                cls.docker_copy_from_container(container_path, local_path)
+            cls.docker_exec(['rm', '-f', container_path])
+
+        if not keep:
+            return None
+        logger.debug(
+            'Profile of %s (%.2fs) saved to %s', file_name, duration, local_path
         )
+        return local_path
+
+    @classmethod
+    def _profiler_name(cls) -> str:
+        return f'{cls._project_name()}_profiler'
+
+    @classmethod
+    def _mark_logs(cls, marker: str) -> None:
+        # Mark the logs of every replica of a scaled service
+        for container_id in cls._container_ids(cls.service):
+            _run_cmd(
+                [
+                    'docker',
+                    'exec',
+                    '--privileged',
+                    container_id,
+                    '/bin/bash',
+                    '-c',
+                    '(date +"%F %T.%N " | tr -d "\n" &&'
+                    f'echo ============= {marker} ================= ) &> /proc/1/fd/1',
+                ]
+            )
 
     @staticmethod
     def get_log_directory() -> str:
@@ -541,6 +1505,17 @@ class AbstractAssetLaunchingHelper:
                 os.makedirs(AssetLaunchingTestCase.log_dir, mode=0o755)
         return str(AssetLaunchingTestCase.log_dir)
 
+    @classmethod
+    def _is_performance_override_enabled(cls) -> bool:
+        return (
+            cls.performance_override
+            or os.getenv('WAZO_TEST_PERFORMANCE_OVERRIDE', '0') == '1'
+        )
+
+    @staticmethod
+    def _is_profiling_enabled() -> bool:
+        return os.getenv('WAZO_TEST_PROFILING_ENABLED', '0') == '1'
+
     @staticmethod
     def _is_coverage_enabled() -> bool:
         return os.getenv('WAZO_TEST_COVERAGE_ENABLED', '0') == '1'
@@ -554,10 +1529,23 @@ class AbstractAssetLaunchingHelper:
 
 
 class AssetLaunchingTestCase(AbstractAssetLaunchingHelper, unittest.TestCase):
+    # Whether setUp checks the watchdog: pytest_asset does it before each test
+    _check_watchdog_in_setup = True
+
     @classmethod
     def setUpClass(cls) -> None:
         cls.launch_service_with_asset()
 
+    def setUp(self) -> None:
+        super().setUp()
+        if not self._check_watchdog_in_setup:
+            return
+        failure = self.watchdog_failure()
+        if failure and self._watchdog_mode() == 'skip':
+            self.skipTest(failure)
+        elif failure:
+            self.fail(failure)
+
     @classmethod
     def tearDownClass(cls) -> None:
         cls.stop_service_with_asset()
@@ -604,6 +1592,58 @@ def make_asset_fixture(
         asset_class.stop_service_with_asset()
 
 
+def project_suffix() -> str:
+    """Suffix isolating the docker-compose projects of a pytest-xdist worker."""
+    worker = os.getenv('PYTEST_XDIST_WORKER')
+    return f'_{worker}' if worker else ''
+
+
+def parse_memory(memory: str) -> int:
+    """Convert a docker memory size such as '512m' or '2g' to bytes."""
+    units = {'b': 1, 'k': 1024, 'm': 1024**2, 'g': 1024**3}
+    memory = memory.strip().lower().removesuffix('b') or '0'
+    if memory[-1] in units:
+        return int(float(memory[:-1]) * units[memory[-1]])
+    return int(memory)
+
+
+def _is_postgres_image(image: str) -> bool:
+    # Only the official image: derived images (e.g. wazo-<service>-db) may ship
+    # their schema in PGDATA, which a tmpfs would hide. See `postgres_services`.
+    return _is_official_image(image, 'postgres')
+
+
+def _is_rabbitmq_image(image: str) -> bool:
+    # Only the official image, as for postgres. See `rabbitmq_services`.
+    return _is_official_image(image, 'rabbitmq')
+
+
+def _is_official_image(image: str, name: str) -> bool:
+    """Whether <image> is the official Docker Hub image <name>, whatever its tag."""
+    repository = image.split('@')[0]
+    untagged, _, tag = repository.rpartition(':')
+    if untagged and '/' not in tag:
+        repository = untagged
+    return repository in (name, f'library/{name}', f'docker.io/library/{name}')
+
+
+def _resource_limits_override(limits: ResourceLimits) -> dict[str, Any]:
+    override: dict[str, Any] = {}
+    if 'cpus' in limits:
+        override['cpus'] = limits['cpus']
+    if 'memory' in limits:
+        override['mem_limit'] = limits['memory']
+        override['memswap_limit'] = limits['memory']
+    if 'pids' in limits:
+        override['pids_limit'] = limits['pids']
+    return override
+
+
+def generated_files_directory(project_name: str) -> Path:
+    """Directory holding the compose files generated for ``project_name``."""
+    return Path(tempfile.gettempdir()) / 'wazo-test-helpers' / project_name
+
+
 def _run_cmd(cmd: list[str], stderr: bool = True) -> subprocess.CompletedProcess:
     logger.debug('%s', cmd)
     error_output = subprocess.STDOUT if stderr else subprocess.PIPE
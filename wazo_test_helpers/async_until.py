@@ -0,0 +1,195 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Awaitable counterparts of the `until` functions, for asyncio test code.
+
+They sleep with `asyncio.sleep` instead of blocking the event loop, so many
+waits can run concurrently in one loop, and accept sync or async functions:
+
+    await async_until.assert_(assert_event_received, timeout=5)
+    user = await async_until.return_(client.users.get, user_uuid, timeout=10)
+
+They take the same message, timeout, tries, interval and policy arguments as
+their `until` counterparts, respect the enclosing `until.deadline` budget and
+are recorded by the `until` telemetry. Cancelling the waiting task stops them
+at once. They do not take a `notifier`, whose condition would block the event
+loop: a TypeError is raised.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+from functools import wraps
+from typing import Any, ParamSpec, TypeVar
+
+from . import _waits
+from .until import NoMoreTries, PollingPolicy
+
+R = TypeVar('R')
+P = ParamSpec('P')
+
+
+def _instrumented(
+    func: Callable[P, Coroutine[Any, Any, R]]
+) -> Callable[P, Coroutine[Any, Any, R]]:
+    """Record the waits of <func> by call site, when telemetry is enabled."""
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        if not _waits.recording:
+            return await func(*args, **kwargs)
+        with _waits.recorded_wait(sys._getframe(1), (AssertionError, NoMoreTries)):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+async def tries_executions(
+    tries: int, interval: float, policy: PollingPolicy | None = None
+) -> AsyncIterator[None]:
+    delays = _waits.lazy_delays(policy, interval)
+    for try_ in range(tries):
+        if try_:
+            delay = next(delays)
+            budget = _waits.remaining_budget()
+            if budget is not None:
+                if budget <= 0:
+                    return
+                delay = min(delay, budget)
+            await _sleep(delay)
+        if _waits.recording:
+            _waits.count_attempt()
+        yield
+
+
+async def timeout_executions(
+    timeout: float, interval: float, policy: PollingPolicy | None = None
+) -> AsyncIterator[None]:
+    delays = _waits.lazy_delays(policy, interval)
+    end_time = time.monotonic() + timeout
+    budget = _waits.remaining_budget()
+    if budget is not None:
+        end_time = min(end_time, time.monotonic() + budget)
+    while True:
+        if _waits.recording:
+            _waits.count_attempt()
+        yield
+        time_left = end_time - time.monotonic()
+        if time_left <= 0:
+            return
+        await _sleep(min(next(delays), time_left))
+
+
+async def _sleep(delay: float) -> None:
+    start = time.monotonic()
+    await asyncio.sleep(delay)
+    if _waits.recording:
+        _waits.count_sleeping(time.monotonic() - start)
+
+
+def _reject_notifier(kwargs: dict[str, Any]) -> None:
+    if 'notifier' in kwargs:
+        raise TypeError(
+            'async_until does not accept a notifier: its waits would block the '
+            'event loop'
+        )
+
+
+def _executions(kwargs: dict[str, Any]) -> AsyncIterator[None]:
+    _reject_notifier(kwargs)
+    timeout = kwargs.pop('timeout', None)
+    tries = kwargs.pop('tries', 1)
+    interval = kwargs.pop('interval', 1)
+    policy = kwargs.pop('policy', None)
+    if timeout:
+        return timeout_executions(timeout, interval, policy)
+    return tries_executions(tries, interval, policy)
+
+
+async def _call(
+    function: Callable[..., R | Awaitable[R]], *args: Any, **kwargs: Any
+) -> R:
+    result = function(*args, **kwargs)
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+@_instrumented
+async def assert_(
+    assert_function: Callable[..., Any], *args: Any, **kwargs: Any
+) -> None:
+    """Awaitable `until.assert_`: <assert_function> may be sync or async."""
+    message = kwargs.pop('message', None)
+    executions = _executions(kwargs)
+    errors: list[str] = []
+
+    async for _ in executions:
+        try:
+            await _call(assert_function, *args, **kwargs)
+            return
+        except AssertionError as e:
+            errors.append(str(e))
+    error_message = '\n'.join(errors)
+    message = _waits.budget_message(message)
+    if message:
+        error_message = message + '\n' + error_message
+    raise AssertionError(error_message)
+
+
+@_instrumented
+async def true(
+    function: Callable[..., R | Awaitable[R]], *args: Any, **kwargs: Any
+) -> R:
+    """Awaitable `until.true`: <function> may be sync or async."""
+    message = kwargs.pop('message', None)
+    executions = _executions(kwargs)
+
+    async for _ in executions:
+        return_value = await _call(function, *args, **kwargs)
+        if return_value:
+            return return_value
+    raise NoMoreTries(_waits.budget_message(message))
+
+
+@_instrumented
+async def false(
+    function: Callable[..., R | Awaitable[R]], *args: Any, **kwargs: Any
+) -> R:
+    """Awaitable `until.false`: <function> may be sync or async."""
+    message = kwargs.pop('message', None)
+    executions = _executions(kwargs)
+
+    async for _ in executions:
+        return_value = await _call(function, *args, **kwargs)
+        if not return_value:
+            return return_value
+    raise NoMoreTries(_waits.budget_message(message))
+
+
+@_instrumented
+async def return_(
+    function: Callable[..., R | Awaitable[R]], *args: Any, **kwargs: Any
+) -> R:
+    """Awaitable `until.return_`: <function> may be sync or async."""
+    _reject_notifier(kwargs)
+    timeout = kwargs.pop('timeout')
+    interval = kwargs.pop('interval', 1)
+    policy = kwargs.pop('policy', None)
+    message = kwargs.pop('message', None)
+    errors: list[str] = []
+
+    async for _ in timeout_executions(timeout, interval, policy):
+        try:
+            return await _call(function, *args, **kwargs)
+        except Exception as e:
+            errors.append(str(e))
+    error_message = '\n'.join(errors)
+    message = _waits.budget_message(message)
+    if message:
+        error_message = message + '\n' + error_message
+    raise NoMoreTries(error_message)
@@ -1,4 +1,4 @@
-# Copyright 2017-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -9,10 +9,13 @@ import uuid
 from collections.abc import Iterator
 from typing import TYPE_CHECKING, Any, TypedDict
 
-import requests
+from ._lazy import lazy_import
 
 if TYPE_CHECKING:
+    import requests
     from wazo_auth_client.types import TokenDict, TokenMetadataDict
+else:
+    requests = lazy_import('requests')
 
 
 logger = logging.getLogger(__name__)
@@ -1,4 +1,4 @@
-# Copyright 2015-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2015-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -6,13 +6,17 @@ from __future__ import annotations
 import uuid
 from typing import TYPE_CHECKING, Any, TypedDict
 
-from kombu import Connection, Consumer, Exchange, Message, Producer, Queue, binding
-from kombu.exceptions import OperationalError, TimeoutError
-
 from wazo_test_helpers import until
+from wazo_test_helpers._lazy import lazy_import
 
 if TYPE_CHECKING:
+    import kombu
+    import kombu.exceptions as kombu_exceptions
     from hamcrest.core.matcher import Matcher
+    from kombu import Exchange, Message, Queue
+else:
+    kombu = lazy_import('kombu')
+    kombu_exceptions = lazy_import('kombu.exceptions')
 
 
 class MessageWithHeadersDict(TypedDict):
@@ -36,17 +40,17 @@ class BusClient:
         exchange_type: str = 'topic',
     ) -> BusClient:
         url = f'amqp://{user}:{password}@{host}:{port}//'
-        exchange = Exchange(exchange_name, type=exchange_type)
+        exchange = kombu.Exchange(exchange_name, type=exchange_type)
         return cls(url, exchange)
 
     def is_up(self) -> bool:
         try:
-            with Connection(self._url) as connection:
-                producer = Producer(
+            with kombu.Connection(self._url) as connection:
+                producer = kombu.Producer(
                     connection, exchange=self._default_exchange, auto_declare=True
                 )
                 producer.publish('', routing_key='test')
-        except (OSError, OperationalError):
+        except (OSError, kombu_exceptions.OperationalError):
             return False
         return True
 
@@ -58,19 +62,19 @@ class BusClient:
     ) -> BusMessageAccumulator:
         exchange = exchange or self._default_exchange
         queue_name = f'test-{str(uuid.uuid4())}'
-        with Connection(self._url) as conn:
+        with kombu.Connection(self._url) as conn:
             if routing_key:
-                queue = Queue(
+                queue = kombu.Queue(
                     name=queue_name,
                     exchange=exchange,
                     routing_key=routing_key,
                     channel=conn.channel(),
                 )
             elif headers:
-                queue = Queue(
+                queue = kombu.Queue(
                     name=queue_name,
                     exchange=exchange,
-                    bindings=[binding(exchange=exchange, arguments=headers)],
+                    bindings=[kombu.binding(exchange=exchange, arguments=headers)],
                     channel=conn.channel(),
                 )
             else:
@@ -89,12 +93,12 @@ class BusClient:
     ) -> None:
         exchange = exchange or self._default_exchange
         headers = headers or {}
-        with Connection(self._url) as connection:
-            producer = Producer(connection, exchange=exchange, auto_declare=True)
+        with kombu.Connection(self._url) as connection:
+            producer = kombu.Producer(connection, exchange=exchange, auto_declare=True)
             producer.publish(payload, routing_key=routing_key, headers=headers)
 
     def queue_declare(self, queue: Queue) -> None:
-        with Connection(self._url) as connection:
+        with kombu.Connection(self._url) as connection:
             channel = connection.default_channel
             queue.bind(channel).declare()
 
@@ -104,9 +108,9 @@ class BusClient:
     ) -> None:
         if not upstream:
             upstream = self._default_exchange
-        with Connection(self._url) as connection:
+        with kombu.Connection(self._url) as connection:
             channel = connection.default_channel
-            exchange = Exchange(name, type_).bind(channel)
+            exchange = kombu.Exchange(name, type_).bind(channel)
             exchange.declare()
             upstream.bind(channel).declare()
             exchange.bind_to(upstream, routing_key='#')
@@ -157,12 +161,12 @@ class BusMessageAccumulator:
         self._events = []
 
     def _pull_events(self) -> None:
-        with Connection(self._url) as conn:
-            with Consumer(conn, self._queue, callbacks=[self._on_event]):
+        with kombu.Connection(self._url) as conn:
+            with kombu.Consumer(conn, self._queue, callbacks=[self._on_event]):
                 try:
                     while True:
                         conn.drain_events(timeout=0.5)
-                except TimeoutError:
+                except kombu_exceptions.TimeoutError:
                     pass
 
     def _on_event(self, body: Any, message: Message) -> None:
@@ -1,13 +1,17 @@
-# Copyright 2018-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import sqlalchemy
-from sqlalchemy.sql import text
+from ._lazy import lazy_import
+
+if TYPE_CHECKING:
+    import sqlalchemy
+else:
+    sqlalchemy = lazy_import('sqlalchemy')
 
 logger = logging.getLogger(__name__)
 
@@ -33,4 +37,4 @@ class DBUserClient:
 
     def execute(self, query: str, **kwargs: Any) -> None:
         with self._engine.connect() as connection:
-            connection.execute(text(query), **kwargs)
+            connection.execute(sqlalchemy.sql.text(query), **kwargs)
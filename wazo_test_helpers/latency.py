@@ -0,0 +1,89 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any, TypedDict
+
+PERCENTILES = ('p50', 'p95', 'p99')
+# Measurements kept in `measurements`, the oldest being dropped beyond it
+MAX_MEASUREMENTS = 1000
+
+
+class Latency(TypedDict):
+    p50: float
+    p95: float
+    p99: float
+
+
+class LatencyMeasurement(TypedDict):
+    asset: str
+    service: str
+    name: str
+    latency: Latency
+
+
+class LatencyBudgetExceeded(AssertionError):
+    def __init__(self, name: str, exceeded: dict[str, tuple[float, float]]) -> None:
+        details = ', '.join(
+            f'{percentile} {measured * 1000:.1f}ms > {budget * 1000:.1f}ms'
+            for percentile, (measured, budget) in exceeded.items()
+        )
+        super().__init__(f'Latency budget of {name} exceeded: {details}')
+        self.exceeded = exceeded
+
+
+# Latest measurements, taken after each test by pytest_asset to record them in
+# the timing history
+measurements: deque[LatencyMeasurement] = deque(maxlen=MAX_MEASUREMENTS)
+
+
+def measure(
+    func: Callable[[], Any], iterations: int = 100, warmup: int = 10
+) -> Latency:
+    """Call ``func`` ``warmup + iterations`` times; return the latency percentiles.
+
+    The ``warmup`` first calls (connection setup, caches) are not measured.
+    """
+    if iterations < 1:
+        raise ValueError('iterations must be at least 1')
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        'p50': percentile(durations, 50),
+        'p95': percentile(durations, 95),
+        'p99': percentile(durations, 99),
+    }
+
+
+def percentile(sorted_durations: list[float], rank: float) -> float:
+    """Nearest-rank percentile of already sorted durations."""
+    index = max(0, -(-len(sorted_durations) * rank // 100) - 1)
+    return sorted_durations[int(index)]
+
+
+def assert_budget(name: str, latency: Latency, **budgets: float) -> None:
+    """Raise ``LatencyBudgetExceeded`` when a percentile is above its budget.
+
+    ``budgets`` are in seconds, by percentile (``p50``, ``p95``, ``p99``).
+    """
+    unknown = set(budgets) - set(PERCENTILES)
+    if unknown:
+        raise ValueError(f'Unknown percentiles: {", ".join(sorted(unknown))}')
+    measured = {'p50': latency['p50'], 'p95': latency['p95'], 'p99': latency['p99']}
+    exceeded = {
+        percentile: (measured[percentile], budget)
+        for percentile, budget in budgets.items()
+        if measured[percentile] > budget
+    }
+    if exceeded:
+        raise LatencyBudgetExceeded(name, exceeded)
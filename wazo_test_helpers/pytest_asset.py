@@ -8,11 +8,49 @@ Integration suites mark each test class with the asset it needs
 lifecycle so suites don't each reimplement it in their conftest:
 
 - tests are grouped by asset so each one is launched once for a contiguous run;
+- the launch and teardown durations of each asset and the duration of each
+  test are recorded with the git revision in a local SQLite database
+  (``WAZO_TEST_TIMING_HISTORY``, see ``timing_history``), and the durations
+  regressing against their rolling median are listed in the terminal summary;
+- assets run in an order based on the durations and failures recorded by
+  previous runs (``WAZO_TEST_ASSET_ORDER=name`` sorts them by name instead):
+  assets that failed recently or give quick feedback first, and, when
+  launching in the background, assets slow to launch after long test groups;
 - an asset is torn down as soon as the next test needs a different one, rather
   than lingering until the session ends;
 - a teardown failure is recorded and reported at the end instead of aborting
   the following test's setup;
-- container logs get per-test start/end markers (``mark_logs``).
+- container logs get per-test start/end markers (``mark_logs``);
+- with ``WAZO_TEST_WATCHDOG`` set to ``fail`` or ``skip``, the remaining tests
+  of an asset whose service under test crashed are failed or skipped at once
+  instead of each waiting for its own timeouts;
+- with ``WAZO_TEST_ASSET_PREFETCH`` set to the maximum number of assets
+  running at once (2 or more), the next assets are launched in the background
+  while the current asset's tests run;
+- with ``WAZO_TEST_ASSET_PARALLEL_LAUNCH`` set to the maximum number of assets
+  running at once, the assets are launched concurrently from the start of the
+  session, within ``WAZO_TEST_ASSET_MEMORY_BUDGET`` (e.g. ``8g``) if set;
+- under pytest-xdist, each asset's tests are grouped on a single worker
+  (``--dist loadgroup``) and every worker gets its own docker-compose project
+  names, so workers only launch the assets they run;
+- ``enable_latency_budget_fixture`` measures the latency of repeated calls
+  against the service under test and checks it against the budgets of the
+  test's ``latency_budget`` marker; the measurements are kept as baselines
+  per asset and service in the timing history;
+- with ``WAZO_TEST_RERUN_FAILURES`` set to a number of reruns, failed tests
+  are rerun at the end of the session grouped by asset: each affected asset is
+  launched once more, or reused if it is still running (not under
+  pytest-xdist);
+- the tests of a class marked ``asset_concurrent`` run concurrently on a
+  thread pool against the same containers (see ``_run_concurrent_group``);
+- with ``WAZO_TEST_UNTIL_TELEMETRY=1``, the ``until`` waits taking the most
+  time are listed in the terminal summary by call site, with their attempts,
+  timeouts and time spent sleeping;
+- the ``until`` waits of a test share a budget (see ``until.deadline``) set
+  by its ``wait_budget(seconds)`` marker, its asset class's ``wait_budget``
+  or ``WAZO_TEST_WAIT_BUDGET``;
+- the resource profile an asset runs with is recorded in each test's report
+  (``user_properties``) and in the terminal summary.
 
 A conftest activates the hooks by calling ``register`` from its own
 ``pytest_configure`` and declares its assets:
@@ -31,18 +69,41 @@ A conftest activates the hooks by calling ``register`` from its own
     base = asset_fixture(asset.APIAssetLaunchingTestCase)
     database = asset_fixture(asset.DBAssetLaunchingTestCase)
     mark_logs = enable_mark_logs_fixture()
+    latency_budget = enable_latency_budget_fixture()
+
+and a test measures the latency of a call within the budgets of its marker (in
+seconds), after warm-up calls:
+
+    @pytest.mark.latency_budget(p95=0.05, p99=0.1)
+    def test_status_latency(self, latency_budget):
+        latency_budget(lambda: self.client.status.check(), iterations=200)
 """
 
 from __future__ import annotations
 
+import io
 import logging
+import os
 import sys
-from collections.abc import Callable, Iterator
+import threading
+import time
+import unittest
+import uuid
+from collections.abc import Callable, Generator, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, Any, Literal
+from typing import TYPE_CHECKING, Any, Literal, TextIO
 
 import pytest
 
+from wazo_test_helpers import latency, until
+from wazo_test_helpers.timing_history import (
+    AssetTimings,
+    Regression,
+    TimingHistory,
+    git_revision,
+)
+
 if TYPE_CHECKING:
     from wazo_test_helpers.asset_launching_test_case import AssetLaunchingTestCase
 
@@ -50,16 +111,67 @@ logger = logging.getLogger(__name__)
 
 _ScopeName = Literal['session', 'package', 'module', 'class', 'function']
 
+# Number of `until` call sites listed in the terminal summary
+_TELEMETRY_WORST_WAITS = 10
+
 _teardowns: dict[str, Callable[[], None]] = {}
 _teardown_failures: list[tuple[str, BaseException]] = []
+_resource_profiles: dict[str, str] = {}
+_asset_classes: dict[str, type[AssetLaunchingTestCase]] = {}
+# Asset class of each fixture built by `asset_fixture`, by fixture function
+_fixture_asset_classes: dict[Callable[..., Any], type[AssetLaunchingTestCase]] = {}
+# Assets in the order their tests run
+_asset_order: list[tuple[str, type[AssetLaunchingTestCase]]] = []
+# Assets launched in the background and not yet used by a test, by marker
+_launches: dict[str, tuple[type[AssetLaunchingTestCase], Future[float]]] = {}
+_executor: ThreadPoolExecutor | None = None
+# Durations and outcomes of the current run
+_phase_durations: list[tuple[str, str, float]] = []
+_test_results: list[tuple[str | None, str, float, str]] = []
+_regressions: list[Regression] = []
+_measurements: list[latency.LatencyMeasurement] = []
+_latencies: list[tuple[latency.LatencyMeasurement, latency.Latency | None]] = []
+_markers_by_nodeid: dict[str, str] = {}
+# Failed tests to rerun at the end of the session, by marker
+_reruns: dict[str, list[pytest.Item]] = {}
+_rerun_attempts: dict[str, int] = {}
+# Tests of `asset_concurrent` classes, by nodeid of the first test of their class
+_concurrent_groups: dict[str, list[pytest.Function]] = {}
+_concurrent_nodeids: set[str] = set()
+# Tests already run with the first test of their class
+_concurrent_ran: set[str] = set()
+# Function-scoped fixtures which do not prevent running a test concurrently
+_concurrency_safe_fixtures: set[Callable[..., Any]] = set()
 
 
 def register(config: pytest.Config) -> None:
     """Activate the asset hooks; call from a conftest's ``pytest_configure``."""
+    from wazo_test_helpers.asset_launching_test_case import AssetLaunchingTestCase
+
     plugin_manager = config.pluginmanager
     module = sys.modules[__name__]
     if not plugin_manager.is_registered(module):
         plugin_manager.register(module)
+    # Checked by pytest_runtest_setup
+    AssetLaunchingTestCase._check_watchdog_in_setup = False
+    config.addinivalue_line(
+        'markers',
+        'latency_budget(p50=None, p95=None, p99=None): latency budgets in seconds '
+        'of the calls measured with the latency_budget fixture',
+    )
+    config.addinivalue_line(
+        'markers',
+        'wait_budget(seconds): total time the until waits of the test may take',
+    )
+    config.addinivalue_line(
+        'markers',
+        'asset_concurrent(max_workers=4): run the tests of a class concurrently '
+        'against the same asset',
+    )
+    if plugin_manager.hasplugin('xdist') and config.getoption('dist', 'no') == 'load':
+        # Send all the tests of an asset to the same worker (see xdist_group)
+        config.option.dist = 'loadgroup'
+        config.option.loadgroup = True
 
 
 def asset_fixture(
@@ -69,36 +181,194 @@ def asset_fixture(
 ) -> Callable[[pytest.FixtureRequest], Iterator[None]]:
     """Build a session-scoped pytest fixture managing ``asset_class``'s lifecycle."""
 
-    @pytest.fixture(scope=scope)
     def _asset(request: pytest.FixtureRequest) -> Iterator[None]:
         with _managed_asset(request, asset_class):
             yield
 
-    return _asset
+    _fixture_asset_classes[_asset] = asset_class
+    return pytest.fixture(scope=scope)(_asset)
 
 
 def enable_mark_logs_fixture() -> Callable[[pytest.FixtureRequest], Iterator[None]]:
-    @pytest.fixture(autouse=True, scope='function')
     def mark_logs(request: pytest.FixtureRequest) -> Iterator[None]:
         cls = request.cls
         if cls is None or not hasattr(cls, 'asset_cls'):
             yield
             return
+        if _collected_nodeid(request.node.nodeid) in _concurrent_nodeids:
+            # marked around the test call itself, see `_run_concurrent_test`
+            yield
+            return
         test_name = f'{cls.__name__}.{request.function.__name__}'
         cls.asset_cls.mark_logs_test_start(test_name)
         yield
         cls.asset_cls.mark_logs_test_end(test_name)
 
-    return mark_logs
+    _concurrency_safe_fixtures.add(mark_logs)
+    return pytest.fixture(autouse=True, scope='function')(mark_logs)
 
 
-@pytest.hookimpl
+def enable_latency_budget_fixture() -> (
+    Callable[[pytest.FixtureRequest], Callable[..., latency.Latency]]
+):
+    def latency_budget(
+        request: pytest.FixtureRequest,
+    ) -> Callable[..., latency.Latency]:
+        cls = request.cls
+        if cls is None or not hasattr(cls, 'asset_cls'):
+            raise pytest.UsageError(
+                'latency_budget requires a test class with an asset_cls attribute'
+            )
+        marker = request.node.get_closest_marker('latency_budget')
+        budgets = dict(marker.kwargs) if marker else {}
+
+        def measure(func: Callable[[], Any], **kwargs: Any) -> latency.Latency:
+            kwargs.setdefault('name', request.node.name)
+            return cls.asset_cls.measure_latency(func, **{**budgets, **kwargs})
+
+        return measure
+
+    _concurrency_safe_fixtures.add(latency_budget)
+    return pytest.fixture(scope='function')(latency_budget)
+
+
+@pytest.hookimpl(tryfirst=True)
 def pytest_collection_modifyitems(
     session: pytest.Session,
     config: pytest.Config,
     items: list[pytest.Item],
 ) -> None:
-    items.sort(key=lambda item: _marker_of(item) or '')
+    _markers_by_nodeid.clear()
+    # Each asset's tests keep their relative order
+    unmarked: list[pytest.Item] = []
+    items_by_marker: dict[str, list[pytest.Item]] = {}
+    for item in items:
+        marker = _marker_of(item)
+        if marker is None:
+            unmarked.append(item)
+            continue
+        _markers_by_nodeid[item.nodeid] = marker
+        if marker in items_by_marker:
+            items_by_marker[marker].append(item)
+        else:
+            items_by_marker[marker] = [item]
+
+    asset_markers = sorted(items_by_marker)
+    if os.getenv('WAZO_TEST_ASSET_ORDER', 'cost') == 'cost':
+        asset_markers = _order_by_cost(asset_markers, _load_timings(config))
+    items[:] = unmarked
+    for marker in asset_markers:
+        items.extend(items_by_marker[marker])
+
+    if config.pluginmanager.hasplugin('xdist'):
+        # Before xdist reads them to schedule whole groups on one worker
+        for item in items:
+            marker = _markers_by_nodeid.get(item.nodeid)
+            if marker is not None:
+                item.add_marker(pytest.mark.xdist_group(marker))
+
+
+@pytest.hookimpl
+def pytest_collection_finish(session: pytest.Session) -> None:
+    """List the assets of the selected tests and group the tests of
+    ``asset_concurrent`` classes, once deselection is done.
+
+    A group is a run of consecutive tests of one class, so that the tests run
+    in between keep their next item, which their teardown relies on.
+    """
+    _asset_order.clear()
+    ordered: set[str] = set()
+    for item in session.items:
+        marker = _markers_by_nodeid.get(_collected_nodeid(item.nodeid))
+        if marker is None or marker in ordered:
+            continue
+        ordered.add(marker)
+        asset_class = _asset_class_of(item, marker)
+        if asset_class is not None:
+            _asset_order.append((marker, asset_class))
+
+    _concurrent_groups.clear()
+    _concurrent_nodeids.clear()
+    group: list[pytest.Function] = []
+    for candidate in [*session.items, None]:
+        concurrent = candidate is not None and _can_run_concurrently(candidate)
+        if group and (
+            not concurrent
+            or candidate.parent is not group[0].parent  # type: ignore[union-attr]
+        ):
+            if len(group) > 1:
+                _concurrent_groups[_collected_nodeid(group[0].nodeid)] = group
+                _concurrent_nodeids.update(
+                    _collected_nodeid(item.nodeid) for item in group
+                )
+            group = []
+        if concurrent:
+            group.append(candidate)  # type: ignore[arg-type]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(
+    item: pytest.Item, nextitem: pytest.Item | None
+) -> bool | None:
+    nodeid = _collected_nodeid(item.nodeid)
+    if nodeid in _concurrent_ran:
+        # Run with the first test of its class
+        _concurrent_ran.discard(nodeid)
+        return True
+    group = _concurrent_groups.pop(nodeid, None)
+    if not group:
+        return None
+    items = item.session.items
+    last_index = items.index(group[-1]) if group[-1] in items else len(items)
+    _run_concurrent_group(
+        group, items[last_index + 1] if last_index + 1 < len(items) else None
+    )
+    return True
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> Generator[None, Any, None]:
+    with until.deadline(_wait_budget(item)):
+        yield
+
+
+@pytest.hookimpl
+def pytest_runtest_logreport(report: pytest.TestReport) -> None:
+    if hasattr(report, 'node'):
+        # Sent by an xdist worker, which records it itself
+        return
+    if report.when == 'teardown':
+        _take_measurements()
+    if report.when == 'call' or report.failed:
+        nodeid = _collected_nodeid(report.nodeid)
+        marker = _markers_by_nodeid.get(nodeid)
+        duration = report.duration if report.when == 'call' else 0.0
+        _test_results.append((marker, nodeid, duration, report.outcome))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(
+    item: pytest.Item, call: pytest.CallInfo[None]
+) -> Generator[None, Any, None]:
+    outcome = yield
+    report: pytest.TestReport = outcome.get_result()
+    if report.when != 'call' or not report.failed or hasattr(report, 'wasxfail'):
+        return
+    marker = _marker_of(item)
+    if marker is None or _rerun_attempts.get(item.nodeid, 0) >= _max_reruns():
+        return
+    # Reported as failed only if its last rerun fails
+    report.outcome = 'rerun'  # type: ignore[assignment]
+    _reruns.setdefault(marker, []).append(item)
+
+
+@pytest.hookimpl
+def pytest_report_teststatus(
+    report: pytest.TestReport, config: pytest.Config
+) -> tuple[str, str, tuple[str, dict[str, bool]]] | None:
+    if report.outcome == 'rerun':  # type: ignore[comparison-overlap]
+        return 'rerun', 'R', ('RERUN', {'yellow': True})
+    return None
 
 
 @pytest.hookimpl(trylast=True)
@@ -115,18 +385,144 @@ def pytest_runtest_teardown(item: pytest.Item, nextitem: pytest.Item | None) ->
             _teardown_failures.append((current, exc))
 
 
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_setup(item: pytest.Item) -> None:
+    marker = _marker_of(item) or ''
+    profile = _resource_profiles.get(marker)
+    if profile:
+        item.user_properties.append(('resource_profile', profile))
+
+    # Also the classes of AssetLaunchingTestCase tests, not checking it themselves
+    asset_class = _asset_classes.get(marker) or _test_case_class(item)
+    failure = asset_class.watchdog_failure() if asset_class else None
+    if asset_class and failure:
+        if asset_class._watchdog_mode() == 'skip':
+            pytest.skip(failure)
+        pytest.fail(failure, pytrace=False)
+
+    if marker:
+        _prefetch(marker)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtestloop(session: pytest.Session) -> Generator[None, Any, None]:
+    no_run = session.config.option.collectonly or session.testsfailed
+    if not no_run and _parallel_launches() >= 2:
+        _schedule_launches(None)
+    outcome = yield
+    if outcome.excinfo is not None:
+        # Interrupted (Ctrl-C, -x, shouldstop...): nothing more to run
+        return
+    for _ in range(_max_reruns()):
+        if not _reruns or session.shouldfail or session.shouldstop:
+            break
+        _rerun_failures(session)
+
+
+@pytest.hookimpl
+def pytest_unconfigure(config: pytest.Config) -> None:
+    from wazo_test_helpers.asset_launching_test_case import AssetLaunchingTestCase
+
+    AssetLaunchingTestCase._check_watchdog_in_setup = True
+
+
+@pytest.hookimpl
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    """Tear down the assets launched in the background but never used."""
+    for marker in list(_teardowns):
+        # kept running for reruns that did not happen
+        try:
+            _teardown(marker)
+        except Exception as exc:
+            logger.exception('Failed to tear down asset for marker %r', marker)
+            _teardown_failures.append((marker, exc))
+    while _launches:
+        marker, (asset_class, launch) = _launches.popitem()
+        try:
+            launch.result()
+            asset_class.tearDownClass()
+        except Exception as exc:
+            logger.exception('Failed to tear down asset for marker %r', marker)
+            _teardown_failures.append((marker, exc))
+    _save_timings(session.config)
+
+
 @pytest.hookimpl
 def pytest_terminal_summary(
     terminalreporter: Any,
     exitstatus: int,
     config: pytest.Config,
 ) -> None:
+    if _resource_profiles:
+        terminalreporter.write_sep('-', 'asset resource profiles')
+        for marker, profile in sorted(_resource_profiles.items()):
+            terminalreporter.write_line(f'{marker}: {profile}')
+    if _latencies:
+        terminalreporter.write_sep('-', 'latencies')
+        for measurement, baseline in _latencies:
+            measured = measurement['latency']
+            line = (
+                f'{measurement["service"]} ({measurement["asset"]}) '
+                f'{measurement["name"]}: p50 {measured["p50"] * 1000:.1f}ms, '
+                f'p95 {measured["p95"] * 1000:.1f}ms, '
+                f'p99 {measured["p99"] * 1000:.1f}ms'
+            )
+            if baseline:
+                line += f' (baseline p95 {baseline["p95"] * 1000:.1f}ms)'
+            terminalreporter.write_line(line)
+    if until.telemetry_enabled():
+        _write_wait_telemetry(terminalreporter, config)
+    if _regressions:
+        terminalreporter.write_sep('-', 'timing regressions')
+        for regression in _regressions:
+            terminalreporter.write_line(
+                f'{regression["key"]} ({regression["phase"]}): '
+                f'{regression["duration"]:.2f}s, median {regression["median"]:.2f}s'
+            )
     for marker, exc in _teardown_failures:
         terminalreporter.write_sep(
             '!', f'Asset teardown failed for marker {marker!r}: {exc}'
         )
 
 
+def _write_wait_telemetry(terminalreporter: Any, config: pytest.Config) -> None:
+    waits = sorted(
+        until.telemetry().items(), key=lambda wait: wait[1]['total'], reverse=True
+    )
+    if not waits:
+        return
+    terminalreporter.write_sep('-', f'until waits (worst {_TELEMETRY_WORST_WAITS})')
+    terminalreporter.write_line(
+        f'{"total":>8} {"sleeping":>8} {"calls":>6} {"tries":>6} '
+        f'{"timeouts":>8} {"to success":>10}  call site'
+    )
+    for call_site, stats in waits[:_TELEMETRY_WORST_WAITS]:
+        path, _, line = call_site.rpartition(':')
+        try:
+            path = os.path.relpath(path, config.rootpath)
+        except ValueError:
+            pass
+        successes = stats['successes']
+        to_success = stats['time_to_success'] / successes if successes else 0
+        terminalreporter.write_line(
+            f'{stats["total"]:>7.2f}s {stats["sleeping"]:>7.2f}s {stats["calls"]:>6} '
+            f'{stats["attempts"]:>6} {stats["timeouts"]:>8} {to_success:>9.2f}s  '
+            f'{path}:{line}'
+        )
+
+
+def _collected_nodeid(nodeid: str) -> str:
+    """Return ``nodeid`` without the ``@<group>`` suffix added by xdist.
+
+    With ``--dist loadgroup``, xdist appends the ``xdist_group`` of a test (its
+    asset marker) to its nodeid, after ``pytest_collection_modifyitems``.
+    """
+    base, separator, group = nodeid.rpartition('@')
+    if separator and _markers_by_nodeid.get(base) == group:
+        return base
+    return nodeid
+
+
 def _marker_of(item: Any) -> str | None:
     """Return the asset name from a test's ``usefixtures`` marker, or ``None``."""
     parent = getattr(item, 'parent', None)
@@ -136,12 +532,547 @@ def _marker_of(item: Any) -> str | None:
     return None
 
 
+def _test_case_class(item: Any) -> type[AssetLaunchingTestCase] | None:
+    """Return the class of an AssetLaunchingTestCase test, if it is one."""
+    cls = getattr(item, 'cls', None)
+    if cls is not None and hasattr(cls, '_check_watchdog_in_setup'):
+        return cls
+    return None
+
+
+def _asset_class_of(item: Any, marker: str) -> type[AssetLaunchingTestCase] | None:
+    """Return the asset class of the ``asset_fixture`` named ``marker``, if any."""
+    fixture_info = getattr(item, '_fixtureinfo', None)
+    fixture_defs = getattr(fixture_info, 'name2fixturedefs', {}).get(marker)
+    if not fixture_defs:
+        return None
+    return _fixture_asset_classes.get(fixture_defs[-1].func)
+
+
+def _timing_history(config: pytest.Config) -> TimingHistory | None:
+    path = os.getenv('WAZO_TEST_TIMING_HISTORY')
+    if path == 'off':
+        return None
+    if not path:
+        cache = getattr(config, 'cache', None)
+        if cache is None:
+            return None
+        path = str(cache.mkdir('wazo_test_helpers') / 'timings.sqlite')
+    return TimingHistory(path)
+
+
+def _load_timings(config: pytest.Config) -> dict[str, AssetTimings]:
+    history = _timing_history(config)
+    if history is None:
+        return {}
+    try:
+        return history.asset_timings()
+    finally:
+        history.close()
+
+
+def _save_timings(config: pytest.Config) -> None:
+    """Record this run's durations and find the ones that regressed."""
+    _take_measurements()
+    if not _phase_durations and not _test_results and not _measurements:
+        return
+    history = _timing_history(config)
+    if history is None:
+        _latencies[:] = [(measurement, None) for measurement in _measurements]
+        return
+    run_id = uuid.uuid4().hex
+    revision = git_revision(config.rootpath)
+    try:
+        history.record_asset_phases(run_id, revision, _phase_durations)
+        history.record_tests(run_id, revision, _test_results)
+        _latencies[:] = [
+            (
+                measurement,
+                history.latency_baseline(
+                    measurement['asset'], measurement['service'], measurement['name']
+                ),
+            )
+            for measurement in _measurements
+        ]
+        history.record_latencies(run_id, revision, _measurements)
+        _regressions[:] = history.regressions(run_id)
+    finally:
+        history.close()
+    _phase_durations.clear()
+    _test_results.clear()
+    _measurements.clear()
+
+
+def _take_measurements() -> None:
+    """Move the latency measurements of the tests run so far to ``_measurements``."""
+    # popleft: tests running concurrently may still be measuring
+    while latency.measurements:
+        _measurements.append(latency.measurements.popleft())
+
+
+def _order_by_cost(markers: list[str], timings: dict[str, AssetTimings]) -> list[str]:
+    """Order assets so that failures and results come as early as possible.
+
+    Assets without history come first (likely new), then by decreasing failure
+    rate and increasing total duration. When assets launch in the background,
+    each following asset is, if possible, the slowest to launch whose launch
+    fits within the test duration of the previous one.
+    """
+
+    def priority(marker: str) -> tuple[bool, float, float]:
+        timing = timings.get(marker)
+        if not timing:
+            return (False, 0.0, 0.0)
+        return (True, -timing['failure_rate'], timing['launch'] + timing['tests'])
+
+    ordered = sorted(markers, key=priority)
+    if _max_running_assets() < 2:
+        return ordered
+
+    result = [marker for marker in ordered if marker not in timings]
+    remaining = [marker for marker in ordered if marker in timings]
+    if remaining and not result:
+        result.append(remaining.pop(0))
+    while remaining:
+        previous = timings.get(result[-1])
+        available = previous['tests'] if previous else 0.0
+        fitting = [m for m in remaining if timings[m]['launch'] <= available]
+        if fitting:
+            upcoming = max(fitting, key=lambda m: timings[m]['launch'])
+        else:
+            upcoming = min(remaining, key=lambda m: timings[m]['launch'])
+        remaining.remove(upcoming)
+        result.append(upcoming)
+    return result
+
+
+def _launch(asset_class: type[AssetLaunchingTestCase]) -> float:
+    """Set up ``asset_class``, returning how long it took."""
+    start = time.monotonic()
+    asset_class.setUpClass()
+    return time.monotonic() - start
+
+
+def _can_run_concurrently(item: pytest.Item) -> bool:
+    """Whether ``item`` may run on a thread pool with the tests of its class.
+
+    Its class must be marked ``asset_concurrent`` and use an asset. The test
+    must not be skipped or expected to fail, nor use function-scoped fixtures
+    (except those of this plugin): they are set up one test at a time and
+    torn down before the body runs.
+    """
+    if not isinstance(item, pytest.Function) or item.cls is None:
+        return False
+    if item.config.getoption('usepdb', False):
+        return False
+    if not item.get_closest_marker('asset_concurrent') or not _marker_of(item):
+        return False
+    asset_class = getattr(item.cls, 'asset_cls', None)
+    if asset_class is not None and asset_class._is_profiling_enabled():
+        # A single profiler runs per asset
+        return False
+    if any(item.get_closest_marker(name) for name in ('skip', 'skipif', 'xfail')):
+        return False
+    for fixture_defs in item._fixtureinfo.name2fixturedefs.values():
+        fixture_def = fixture_defs[-1]
+        if fixture_def.scope != 'function':
+            continue
+        if fixture_def.func not in _concurrency_safe_fixtures:
+            return False
+    return True
+
+
+def _run_concurrent_group(
+    group: list[pytest.Function], nextitem: pytest.Item | None
+) -> None:
+    """Run the bodies of the tests of ``group`` together on a thread pool.
+
+    Each test is set up as usual, building its own function-scoped fixtures,
+    then torn down, as the next one cannot be set up before: its fixtures are
+    those of this plugin, still valid after their teardown (see
+    ``_can_run_concurrently``). The last test is torn down once all the bodies
+    are done. Each body is timed in its thread, with its ``mark_logs``
+    markers written around it, and its output and log records are captured
+    into its own report (see ``_ConcurrentOutput``). The reports are then
+    logged per test, in order.
+
+    The bodies run outside the ``pytest_runtest_call`` hooks: plugins wrapping
+    them (e.g. pytest-timeout) do not apply, and output written to the file
+    descriptors (e.g. by subprocesses) is not captured.
+    """
+    marker = group[0].get_closest_marker('asset_concurrent')
+    max_workers = marker.kwargs.get('max_workers', 4) if marker else 4
+    reraise = (pytest.exit.Exception, KeyboardInterrupt)
+    runs: list[_ConcurrentRun] = []
+    try:
+        for index, item in enumerate(group):
+            _concurrent_ran.add(_collected_nodeid(item.nodeid))
+            run = _ConcurrentRun(item)
+            runs.append(run)
+            run.setup = _call_and_report(item, 'setup', reraise)
+            if run.setup.passed:
+                run.body, run.result = _test_body(item)
+            if index + 1 < len(group):
+                run.teardown = _call_and_report(
+                    item, 'teardown', reraise, group[index + 1]
+                )
+
+        output = _ConcurrentOutput(group[0].config)
+        executor = ThreadPoolExecutor(max_workers, thread_name_prefix='asset-test')
+        with output.routed():
+            try:
+                for run in runs:
+                    if run.body is not None:
+                        run.future = executor.submit(_run_concurrent_test, run, output)
+                wait([run.future for run in runs if run.future is not None])
+            finally:
+                # Interrupted: the bodies not started are dropped, the others
+                # must end before the asset is torn down
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        for run in runs:
+            item = run.item
+            item.ihook.pytest_runtest_logstart(
+                nodeid=item.nodeid, location=item.location
+            )
+            item.ihook.pytest_runtest_logreport(report=run.setup)
+            if run.future is not None:
+                call = run.future.result()
+                if run.result is not None:
+                    run.result.replay(item)
+                for key, content in run.sections:
+                    item.add_report_section('call', key, content)
+                report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+                item.ihook.pytest_runtest_logreport(report=report)
+            if run.teardown is None:
+                run.teardown = _call_and_report(item, 'teardown', reraise, nextitem)
+            item.ihook.pytest_runtest_logreport(report=run.teardown)
+            item.ihook.pytest_runtest_logfinish(
+                nodeid=item.nodeid, location=item.location
+            )
+            _concurrent_nodeids.discard(_collected_nodeid(item.nodeid))
+    finally:
+        for run in runs:
+            # As pytest does after the teardown of a test
+            run.item._request = False  # type: ignore[assignment]
+            run.item.funcargs = None  # type: ignore[assignment]
+
+
+class _ConcurrentRun:
+    def __init__(self, item: pytest.Function) -> None:
+        self.item = item
+        self.setup: pytest.TestReport
+        self.body: Callable[[], None] | None = None
+        self.result: _RecordedTestResult | None = None
+        self.future: Future[pytest.CallInfo[None]] | None = None
+        # Captured output of the body, as (stdout, stderr or log, text)
+        self.sections: list[tuple[str, str]] = []
+        self.teardown: pytest.TestReport | None = None
+
+
+class _ConcurrentOutput:
+    """Capture the output of each concurrent test body for its own report.
+
+    While routed, ``sys.stdout`` and ``sys.stderr`` write the text of a
+    thread capturing its output to its own buffer, and a root logger handler
+    keeps the records of that thread, formatted as the logging plugin does.
+    Output is not captured with ``-s``, log records are.
+    """
+
+    def __init__(self, config: pytest.Config) -> None:
+        self.capture_output = config.getoption('capture', 'fd') != 'no'
+        logging_plugin = config.pluginmanager.get_plugin('logging-plugin')
+        self.log_level: int | None = getattr(logging_plugin, 'log_level', None)
+        formatter = getattr(logging_plugin, 'formatter', None)
+        self.log_handler = _ThreadLogHandler(self.log_level or logging.NOTSET)
+        self.log_handler.setFormatter(formatter or logging.Formatter())
+        self.stdout_buffers: dict[int, io.StringIO] = {}
+        self.stderr_buffers: dict[int, io.StringIO] = {}
+
+    @contextmanager
+    def routed(self) -> Iterator[None]:
+        root_logger = logging.getLogger()
+        root_level = root_logger.level
+        stdout, stderr = sys.stdout, sys.stderr
+        if self.capture_output:
+            sys.stdout = _ThreadStream(stdout, self.stdout_buffers)
+            sys.stderr = _ThreadStream(stderr, self.stderr_buffers)
+        root_logger.addHandler(self.log_handler)
+        if self.log_level is not None:
+            root_logger.setLevel(self.log_level)
+        try:
+            yield
+        finally:
+            root_logger.setLevel(root_level)
+            root_logger.removeHandler(self.log_handler)
+            sys.stdout, sys.stderr = stdout, stderr
+
+    @contextmanager
+    def captured(self, sections: list[tuple[str, str]]) -> Iterator[None]:
+        """Capture the output of the current thread into ``sections``."""
+        thread = threading.get_ident()
+        buffers = {
+            'stdout': self.stdout_buffers,
+            'stderr': self.stderr_buffers,
+            'log': self.log_handler.buffers,
+        }
+        for thread_buffers in buffers.values():
+            thread_buffers[thread] = io.StringIO()
+        try:
+            yield
+        finally:
+            for key, thread_buffers in buffers.items():
+                content = thread_buffers.pop(thread).getvalue()
+                if content:
+                    sections.append((key, content))
+
+
+class _ThreadStream:
+    """Stand-in for ``sys.stdout`` or ``sys.stderr`` writing the text of the
+    threads capturing their output to their own buffer."""
+
+    def __init__(self, stream: TextIO, buffers: dict[int, io.StringIO]) -> None:
+        self._stream = stream
+        self._buffers = buffers
+
+    def write(self, text: str) -> int:
+        return self._buffers.get(threading.get_ident(), self._stream).write(text)
+
+    def flush(self) -> None:
+        if threading.get_ident() not in self._buffers:
+            self._stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class _ThreadLogHandler(logging.Handler):
+    """Keep the records of the threads capturing their output."""
+
+    def __init__(self, level: int) -> None:
+        super().__init__(level)
+        self.buffers: dict[int, io.StringIO] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        buffer = self.buffers.get(record.thread)  # type: ignore[arg-type]
+        if buffer is not None:
+            buffer.write(self.format(record) + '\n')
+
+
+def _call_and_report(
+    item: pytest.Function,
+    when: Literal['setup', 'teardown'],
+    reraise: tuple[type[BaseException], ...],
+    nextitem: pytest.Item | None = None,
+) -> pytest.TestReport:
+    """Run the setup or teardown of ``item`` and return its report, not logged."""
+    if when == 'setup':
+        call = pytest.CallInfo.from_call(
+            lambda: item.ihook.pytest_runtest_setup(item=item), when, reraise
+        )
+    else:
+        call = pytest.CallInfo.from_call(
+            lambda: item.ihook.pytest_runtest_teardown(item=item, nextitem=nextitem),
+            when,
+            reraise,
+        )
+    report: pytest.TestReport = item.ihook.pytest_runtest_makereport(
+        item=item, call=call
+    )
+    return report
+
+
+def _test_body(
+    item: pytest.Function,
+) -> tuple[Callable[[], None], _RecordedTestResult | None]:
+    """Return the body of a test set up, runnable after its teardown."""
+    if item.cls is not None and issubclass(item.cls, unittest.TestCase):
+        # The teardown of the item forgets its test case
+        testcase = item.instance
+        result = _RecordedTestResult()
+        return (lambda: testcase(result=result)), result
+    return item.runtest, None
+
+
+class _RecordedTestResult(unittest.TestResult):
+    """Record the outcomes of a unittest test case run in another thread.
+
+    pytest's unittest items are the result of their test case, and report
+    subtests as soon as they end: ``replay`` gives them the outcomes from the
+    main thread, in order.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.outcomes: list[tuple[str, tuple[Any, ...]]] = []
+
+    def addError(self, test: unittest.TestCase, err: Any) -> None:
+        self.outcomes.append(('addError', (test, err)))
+
+    def addFailure(self, test: unittest.TestCase, err: Any) -> None:
+        self.outcomes.append(('addFailure', (test, err)))
+
+    def addSkip(self, test: unittest.TestCase, reason: str) -> None:
+        self.outcomes.append(('addSkip', (test, reason)))
+
+    def addExpectedFailure(self, test: unittest.TestCase, err: Any) -> None:
+        self.outcomes.append(('addExpectedFailure', (test, err)))
+
+    def addUnexpectedSuccess(self, test: unittest.TestCase) -> None:
+        self.outcomes.append(('addUnexpectedSuccess', (test,)))
+
+    def addSubTest(
+        self, test: unittest.TestCase, subtest: unittest.TestCase, err: Any
+    ) -> None:
+        self.outcomes.append(('addSubTest', (test, subtest, err)))
+
+    def replay(self, item: pytest.Item) -> None:
+        for outcome, args in self.outcomes:
+            getattr(item, outcome)(*args)
+
+
+def _run_concurrent_test(
+    run: _ConcurrentRun, output: _ConcurrentOutput
+) -> pytest.CallInfo[None]:
+    item = run.item
+    body = run.body
+    assert body is not None
+    asset_class = getattr(item.cls, 'asset_cls', None)
+    test_name = f'{item.cls.__name__}.{item.function.__name__}'
+    if asset_class is not None:
+        asset_class.mark_logs_test_start(test_name)
+    try:
+        with output.captured(run.sections), until.deadline(_wait_budget(item)):
+            return pytest.CallInfo.from_call(body, 'call', (pytest.exit.Exception,))
+    finally:
+        if asset_class is not None:
+            asset_class.mark_logs_test_end(test_name)
+
+
+def _wait_budget(item: pytest.Item) -> float | None:
+    """Seconds the ``until`` waits of a test may take in total, if limited.
+
+    From the test's ``wait_budget`` marker, else its asset class's
+    ``wait_budget``, else ``WAZO_TEST_WAIT_BUDGET``.
+    """
+    marker = item.get_closest_marker('wait_budget')
+    if marker and marker.args:
+        return float(marker.args[0])
+    asset_marker = _markers_by_nodeid.get(_collected_nodeid(item.nodeid), '')
+    asset_class = _asset_classes.get(asset_marker)
+    if asset_class is not None and asset_class.wait_budget is not None:
+        return asset_class.wait_budget
+    budget = os.getenv('WAZO_TEST_WAIT_BUDGET')
+    return float(budget) if budget else None
+
+
+def _max_reruns() -> int:
+    if _xdist_worker():
+        # The controller schedules the tests of a worker
+        return 0
+    return int(os.getenv('WAZO_TEST_RERUN_FAILURES', '0'))
+
+
+def _rerun_failures(session: pytest.Session) -> None:
+    """Rerun the failed tests, grouped by asset in the order assets ran.
+
+    An asset whose tests failed last in the session is still running (see
+    ``_managed_asset``) and is reused first; the others are launched once more
+    by their fixture and torn down when the next asset's tests start.
+    """
+    order = [marker for marker, _ in _asset_order]
+
+    def rank(marker: str) -> tuple[bool, int]:
+        # Running assets first, not to keep them waiting
+        return (
+            marker not in _teardowns,
+            order.index(marker) if marker in order else -1,
+        )
+
+    markers = sorted(_reruns, key=rank)
+    items = [item for marker in markers for item in _reruns[marker]]
+    _reruns.clear()
+    for index, item in enumerate(items):
+        nextitem = items[index + 1] if index + 1 < len(items) else None
+        _rerun_attempts[item.nodeid] = _rerun_attempts.get(item.nodeid, 0) + 1
+        if isinstance(item, pytest.Function):
+            # Forget the fixture values of the previous run
+            item._initrequest()
+        item.ihook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+        if session.shouldfail or session.shouldstop:
+            break
+
+
+def _parallel_launches() -> int:
+    return int(os.getenv('WAZO_TEST_ASSET_PARALLEL_LAUNCH', '1'))
+
+
+def _max_running_assets() -> int:
+    if _xdist_worker():
+        # A worker does not know in advance which assets it will run
+        return 1
+    prefetch = int(os.getenv('WAZO_TEST_ASSET_PREFETCH', '1'))
+    return max(prefetch, _parallel_launches())
+
+
+def _xdist_worker() -> str | None:
+    return os.getenv('PYTEST_XDIST_WORKER')
+
+
+def _memory_budget() -> int | None:
+    from wazo_test_helpers.asset_launching_test_case import parse_memory
+
+    budget = os.getenv('WAZO_TEST_ASSET_MEMORY_BUDGET')
+    return parse_memory(budget) if budget else None
+
+
+def _prefetch(current: str) -> None:
+    """Launch the assets following ``current`` while there is room for them."""
+    markers = [marker for marker, _ in _asset_order]
+    if current in markers:
+        _schedule_launches(markers.index(current))
+
+
+def _schedule_launches(current_index: int | None) -> None:
+    """Launch in the background the assets after ``current_index`` that fit.
+
+    At most ``_max_running_assets()`` assets run or launch at once and, when a
+    memory budget is set, their ``memory_estimate()`` must fit within it.
+    """
+    global _executor
+
+    limit = _max_running_assets()
+    if limit < 2:
+        return
+    budget = _memory_budget()
+    start = 0 if current_index is None else current_index + 1
+
+    for marker, asset_class in _asset_order[start:]:
+        if len(_teardowns) + len(_launches) >= limit:
+            break
+        if marker in _launches or marker in _teardowns:
+            continue
+        # Assets not torn down yet, or launching
+        running = [_asset_classes[m] for m in _teardowns if m in _asset_classes]
+        running += [cls for cls, _ in _launches.values()]
+        if budget is not None and running:
+            in_use = sum(cls.memory_estimate() or 0 for cls in running)
+            if in_use + (asset_class.memory_estimate() or 0) > budget:
+                break
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix='asset-launch')
+        logger.debug('Launching asset for marker %r in the background', marker)
+        _launches[marker] = (asset_class, _executor.submit(_launch, asset_class))
+
+
 def _teardown(marker: str) -> None:
     """Run and forget the teardown registered for ``marker`` (idempotent)."""
     teardown = _teardowns.get(marker)
     if teardown is not None:
+        start = time.monotonic()
         teardown()
         _teardowns.pop(marker, None)
+        _phase_durations.append((marker, 'teardown', time.monotonic() - start))
 
 
 @contextmanager
@@ -151,13 +1082,30 @@ def _managed_asset(
 ) -> Iterator[None]:
     """Set up ``asset_class`` and ensure it is torn down exactly once."""
     marker = request.fixturename
-    asset_class.setUpClass()
+    prefetched = _launches.pop(marker, None) if marker else None
+    if marker and marker in _teardowns:
+        # Kept running for reruns
+        duration = None
+    elif prefetched:
+        _, launch = prefetched
+        duration = launch.result()
+    else:
+        duration = _launch(asset_class)
+    if marker and duration is not None:
+        _phase_durations.append((marker, 'launch', duration))
+    profile = asset_class.active_resource_profile()
+    if marker and profile:
+        _resource_profiles[marker] = profile
     if marker:
+        _asset_classes[marker] = asset_class
         _teardowns[marker] = asset_class.tearDownClass
     try:
         yield
     finally:
-        if marker:
+        if marker in _reruns and marker in _teardowns:
+            logger.debug('Keeping asset for marker %r running for reruns', marker)
+        elif marker:
+            _asset_classes.pop(marker, None)
             _teardown(marker)
         else:
             asset_class.tearDownClass()
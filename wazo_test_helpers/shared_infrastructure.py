@@ -0,0 +1,250 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Infrastructure services launched once and shared by several assets.
+
+Starting postgres and rabbitmq is the slowest part of most asset launches. An
+asset declaring a ``shared_infrastructure`` attaches its containers to the
+network of a single, session-wide project running those services instead of
+starting its own. Each asset gets its own database and rabbitmq vhost, which
+are recreated on every launch of the asset:
+
+    class SharedInfrastructure(AbstractSharedInfrastructure):
+        name = 'wazo-shared'
+        assets_root = ASSETS_ROOT  # contains docker-compose.shared.yml
+
+    class AssetLaunchingTestCase(asset_launching_test_case.AssetLaunchingTestCase):
+        shared_infrastructure = SharedInfrastructure
+        ...
+
+The asset compose files may then use the following variables:
+
+- ``WAZO_TEST_SHARED_POSTGRES_HOST`` / ``WAZO_TEST_SHARED_DATABASE``
+- ``WAZO_TEST_SHARED_RABBITMQ_HOST`` / ``WAZO_TEST_SHARED_VHOST``
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import ClassVar
+
+from .asset_launching_test_case import (
+    ContainerCommandFailed,
+    ContainerStartFailed,
+    NoSuchService,
+    _run_cmd,
+    generated_files_directory,
+    get_container_management_enabled,
+    project_suffix,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AbstractSharedInfrastructure:
+    """
+    The following two attributes must be defined on subclasses.
+    """
+
+    name: str  # The docker-compose project name of the shared services
+    assets_root: str | Path  # Directory containing `compose_file`
+
+    compose_file: str = 'docker-compose.shared.yml'
+    bootstrap_container: str | None = 'sync'
+
+    postgres_service: str | None = 'postgres'
+    postgres_user: str = 'postgres'
+    # Database cloned for each asset, e.g. one already containing the schema
+    postgres_template: str | None = None
+
+    rabbitmq_service: str | None = 'rabbitmq'
+    rabbitmq_user: str = 'guest'
+
+    _launched: ClassVar[set[str]] = set()
+    # Assets may be launched concurrently by pytest_asset
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def project_name(cls) -> str:
+        return cls.name + project_suffix()
+
+    @classmethod
+    def network_name(cls) -> str:
+        return f'{cls.project_name()}_shared'
+
+    @classmethod
+    def is_launched(cls) -> bool:
+        return cls.name in cls._launched
+
+    @classmethod
+    def ensure_launched(cls) -> None:
+        """Launch the shared services unless they already run in this session."""
+        with cls._lock:
+            cls._ensure_launched()
+
+    @classmethod
+    def _ensure_launched(cls) -> None:
+        if cls.is_launched() or not get_container_management_enabled():
+            return
+
+        logger.debug('Launching shared infrastructure %s...', cls.name)
+        _run_cmd(
+            ['docker', 'compose']
+            + cls._docker_compose_options()
+            + ['down', '--timeout', '0', '--volumes']
+        )
+        command = ['docker', 'compose'] + cls._docker_compose_options()
+        if cls.bootstrap_container:
+            command += ['run', '--rm', cls.bootstrap_container]
+        else:
+            command += ['up', '--detach', '--wait']
+        completed_process = _run_cmd(command)
+        if completed_process.returncode != 0:
+            stdout = completed_process.stdout
+            stderr = completed_process.stderr
+            raise ContainerStartFailed(
+                stdout=stdout.decode('unicode-escape') if stdout else '',
+                stderr=stderr.decode('unicode-escape') if stderr else '',
+                return_code=completed_process.returncode,
+            )
+        cls._launched.add(cls.name)
+        atexit.register(cls.stop)
+        logger.debug('Done.')
+
+    @classmethod
+    def stop(cls) -> None:
+        if not cls.is_launched():
+            return
+        logger.debug('Stopping shared infrastructure %s...', cls.name)
+        _run_cmd(
+            ['docker', 'compose']
+            + cls._docker_compose_options()
+            + ['down', '--timeout', '0', '--volumes']
+        )
+        cls._launched.discard(cls.name)
+        logger.debug('Done.')
+
+    @classmethod
+    def asset_environment(cls, project_name: str) -> dict[str, str]:
+        """Compose variables telling an asset where its isolated resources are."""
+        resource_name = cls.resource_name(project_name)
+        environment = {'WAZO_TEST_SHARED_NETWORK': cls.network_name()}
+        if cls.postgres_service:
+            environment['WAZO_TEST_SHARED_POSTGRES_HOST'] = cls.postgres_service
+            environment['WAZO_TEST_SHARED_DATABASE'] = resource_name
+        if cls.rabbitmq_service:
+            environment['WAZO_TEST_SHARED_RABBITMQ_HOST'] = cls.rabbitmq_service
+            environment['WAZO_TEST_SHARED_VHOST'] = resource_name
+        return environment
+
+    @classmethod
+    def asset_override(cls, services: list[str]) -> dict:
+        """Compose override attaching every asset service to the shared network."""
+        return {
+            'services': {
+                service: {'networks': ['default', 'shared']} for service in services
+            },
+            'networks': {
+                'shared': {'name': cls.network_name(), 'external': True},
+            },
+        }
+
+    @classmethod
+    def provision(cls, project_name: str) -> None:
+        """(Re)create the database and vhost isolating ``project_name``."""
+        cls.release(project_name)
+        resource_name = cls.resource_name(project_name)
+        if cls.postgres_service:
+            create = f'CREATE DATABASE "{resource_name}"'
+            if cls.postgres_template:
+                create += f' TEMPLATE "{cls.postgres_template}"'
+            cls._exec(cls.postgres_service, cls._psql(create))
+        if cls.rabbitmq_service:
+            cls._exec(cls.rabbitmq_service, ['rabbitmqctl', 'add_vhost', resource_name])
+            cls._exec(
+                cls.rabbitmq_service,
+                [
+                    'rabbitmqctl',
+                    'set_permissions',
+                    '-p',
+                    resource_name,
+                    cls.rabbitmq_user,
+                    '.*',
+                    '.*',
+                    '.*',
+                ],
+            )
+
+    @classmethod
+    def release(cls, project_name: str) -> None:
+        """Drop the database and vhost of ``project_name``, if they exist."""
+        if not cls.is_launched():
+            return
+        resource_name = cls.resource_name(project_name)
+        if cls.postgres_service:
+            drop = f'DROP DATABASE IF EXISTS "{resource_name}" WITH (FORCE)'
+            cls._exec(cls.postgres_service, cls._psql(drop))
+        if cls.rabbitmq_service:
+            cls._exec(
+                cls.rabbitmq_service,
+                ['rabbitmqctl', 'delete_vhost', resource_name],
+                check=False,
+            )
+
+    @staticmethod
+    def resource_name(project_name: str) -> str:
+        return re.sub(r'[^a-z0-9_]', '_', project_name.lower())
+
+    @classmethod
+    def _psql(cls, query: str) -> list[str]:
+        return ['psql', '-U', cls.postgres_user, '-c', query]
+
+    @classmethod
+    def _exec(cls, service_name: str, command: list[str], check: bool = True) -> None:
+        docker_command = ['docker', 'exec', cls._container_id(service_name)]
+        return_code = _run_cmd(docker_command + command).returncode
+        if check and return_code:
+            raise ContainerCommandFailed(command, service_name, return_code)
+
+    @classmethod
+    def _container_id(cls, service_name: str) -> str:
+        result = _run_cmd(
+            ['docker', 'compose']
+            + cls._docker_compose_options()
+            + ['ps', '-q', service_name],
+            stderr=False,
+        ).stdout.strip()
+        if not result:
+            raise NoSuchService(service_name)
+        return str(result.decode('utf-8'))
+
+    @classmethod
+    def _docker_compose_options(cls) -> list[str]:
+        return [
+            '--ansi',
+            'never',
+            '--project-name',
+            cls.project_name(),
+            '--file',
+            str(Path(cls.assets_root) / cls.compose_file),
+            '--file',
+            str(cls._network_override_path()),
+        ]
+
+    @classmethod
+    def _network_override_path(cls) -> Path:
+        # Gives the shared project's default network a fixed name that assets
+        # can declare as external.
+        path = (
+            generated_files_directory(cls.project_name()) / 'docker-compose.network.yml'
+        )
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            override = {'networks': {'default': {'name': cls.network_name()}}}
+            path.write_text(json.dumps(override, indent=2))
+        return path
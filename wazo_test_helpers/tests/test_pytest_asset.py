@@ -0,0 +1,128 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import pytest
+
+pytest_plugins = ['pytester']
+
+CONFTEST = '''
+from wazo_test_helpers.asset_launching_test_case import AssetLaunchingTestCase
+from wazo_test_helpers.pytest_asset import asset_fixture, register
+
+
+def make_asset(name):
+    class Asset(AssetLaunchingTestCase):
+        service = name
+        asset = name
+        assets_root = '/tmp'
+
+        @classmethod
+        def setUpClass(cls):
+            with open('events.log', 'a') as events:
+                events.write(f'launch {name}\\n')
+
+        @classmethod
+        def tearDownClass(cls):
+            with open('events.log', 'a') as events:
+                events.write(f'teardown {name}\\n')
+
+    return Asset
+
+
+def pytest_configure(config):
+    register(config)
+
+
+asset_a = asset_fixture(make_asset('a'))
+asset_b = asset_fixture(make_asset('b'))
+'''
+
+TESTS = '''
+import pytest
+
+
+@pytest.mark.usefixtures('asset_a')
+class TestA:
+    def test_1(self):
+        pass
+
+    def test_2(self):
+        pass
+
+
+@pytest.mark.usefixtures('asset_b')
+class TestB:
+    def test_1(self):
+        pass
+'''
+
+
+@pytest.fixture
+def assets(pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('WAZO_TEST_TIMING_HISTORY', 'off')
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(test_assets=TESTS)
+
+
+@pytest.mark.parametrize(
+    'variable', ['WAZO_TEST_ASSET_PARALLEL_LAUNCH', 'WAZO_TEST_ASSET_PREFETCH']
+)
+def test_deselected_asset_is_not_launched(
+    assets: None,
+    pytester: pytest.Pytester,
+    monkeypatch: pytest.MonkeyPatch,
+    variable: str,
+) -> None:
+    monkeypatch.setenv(variable, '2')
+
+    result = pytester.runpytest_subprocess('-p', 'no:randomly', '-k', 'TestA')
+
+    result.assert_outcomes(passed=2, deselected=1)
+    events = (pytester.path / 'events.log').read_text().splitlines()
+    assert events == ['launch a', 'teardown a']
+
+
+CONCURRENT_TESTS = '''
+import logging
+
+import pytest
+
+
+@pytest.mark.asset_concurrent
+@pytest.mark.usefixtures('asset_a')
+class TestConcurrent:
+    def test_1(self):
+        print('OUT-1')
+        logging.getLogger('test').warning('LOG-1')
+        assert False
+
+    def test_2(self):
+        print('OUT-2')
+        assert False
+'''
+
+
+def test_concurrent_output_is_captured_per_test(
+    assets: None, pytester: pytest.Pytester
+) -> None:
+    pytester.makepyfile(test_concurrent=CONCURRENT_TESTS)
+
+    result = pytester.runpytest_subprocess(
+        '-p', 'no:randomly', '-k', 'TestConcurrent', '-rN'
+    )
+
+    result.assert_outcomes(failed=2, deselected=3)
+    result.stdout.fnmatch_lines(
+        [
+            '*_ TestConcurrent.test_1 _*',
+            '*- Captured stdout call -*',
+            'OUT-1',
+            '*- Captured log call -*',
+            '*LOG-1',
+            '*_ TestConcurrent.test_2 _*',
+            '*- Captured stdout call -*',
+            'OUT-2',
+        ]
+    )
@@ -0,0 +1,314 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Local history of asset and test durations, stored in SQLite.
+
+``pytest_asset`` records, for every run, the duration of each asset phase
+(``launch``, ``teardown``) and of each test, keyed by asset marker, test id and
+git revision. The history drives the ordering of assets and flags durations
+regressing against their rolling median. It also keeps the latency baselines
+measured by ``measure_latency``, by asset and service:
+
+    python -m wazo_test_helpers.timing_history .pytest_cache/d/wazo_test_helpers/timings.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import statistics
+import subprocess
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TypedDict
+
+from .latency import Latency, LatencyMeasurement
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS asset_phase (
+    run_id TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    marker TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    duration REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS asset_phase__marker ON asset_phase (marker, phase);
+CREATE TABLE IF NOT EXISTS test (
+    run_id TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    marker TEXT,
+    test_id TEXT NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS test__test_id ON test (test_id);
+CREATE INDEX IF NOT EXISTS test__marker ON test (marker, run_id);
+CREATE TABLE IF NOT EXISTS latency (
+    run_id TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    asset TEXT NOT NULL,
+    service TEXT NOT NULL,
+    name TEXT NOT NULL,
+    p50 REAL NOT NULL,
+    p95 REAL NOT NULL,
+    p99 REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS latency__name ON latency (asset, service, name);
+'''
+
+# Number of previous runs used to compute medians
+DEFAULT_WINDOW = 20
+# A duration regresses above median * threshold, and by at least MIN_REGRESSION s
+DEFAULT_THRESHOLD = 1.5
+MIN_REGRESSION = 0.1
+MIN_LATENCY_REGRESSION = 0.001
+
+
+class AssetTimings(TypedDict):
+    launch: float
+    tests: float
+    failure_rate: float
+
+
+class Regression(TypedDict):
+    key: str  # asset marker, test id or measured latency
+    phase: str  # launch, teardown, test or p95
+    duration: float
+    median: float
+
+
+class TimingHistory:
+    def __init__(self, path: str | Path) -> None:
+        self._connection = sqlite3.connect(str(path), timeout=30)
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def record_asset_phases(
+        self, run_id: str, revision: str, durations: Iterable[tuple[str, str, float]]
+    ) -> None:
+        """Record ``(marker, phase, duration)`` entries of a run."""
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                'INSERT INTO asset_phase VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (run_id, revision, marker, phase, duration, now)
+                    for marker, phase, duration in durations
+                ],
+            )
+
+    def record_tests(
+        self,
+        run_id: str,
+        revision: str,
+        tests: Iterable[tuple[str | None, str, float, str]],
+    ) -> None:
+        """Record ``(marker, test_id, duration, outcome)`` entries of a run."""
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                'INSERT INTO test VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (run_id, revision, marker, test_id, duration, outcome, now)
+                    for marker, test_id, duration, outcome in tests
+                ],
+            )
+
+    def record_latencies(
+        self, run_id: str, revision: str, measurements: Iterable[LatencyMeasurement]
+    ) -> None:
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                'INSERT INTO latency VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        run_id,
+                        revision,
+                        measurement['asset'],
+                        measurement['service'],
+                        measurement['name'],
+                        measurement['latency']['p50'],
+                        measurement['latency']['p95'],
+                        measurement['latency']['p99'],
+                        now,
+                    )
+                    for measurement in measurements
+                ],
+            )
+
+    def asset_phase_durations(
+        self,
+        marker: str,
+        phase: str,
+        limit: int = DEFAULT_WINDOW,
+        exclude_run: str | None = None,
+    ) -> list[float]:
+        """Return the latest durations of an asset phase, most recent first."""
+        rows = self._connection.execute(
+            'SELECT duration FROM asset_phase WHERE marker = ? AND phase = ? '
+            'AND run_id IS NOT ? ORDER BY recorded_at DESC LIMIT ?',
+            (marker, phase, exclude_run, limit),
+        )
+        return [duration for duration, in rows]
+
+    def test_durations(
+        self, test_id: str, limit: int = DEFAULT_WINDOW, exclude_run: str | None = None
+    ) -> list[float]:
+        """Return the latest durations of a passed test, most recent first."""
+        rows = self._connection.execute(
+            "SELECT duration FROM test WHERE test_id = ? AND outcome = 'passed' "
+            'AND run_id IS NOT ? ORDER BY recorded_at DESC LIMIT ?',
+            (test_id, exclude_run, limit),
+        )
+        return [duration for duration, in rows]
+
+    def latency_baseline(
+        self,
+        asset: str,
+        service: str,
+        name: str,
+        window: int = DEFAULT_WINDOW,
+        exclude_run: str | None = None,
+    ) -> Latency | None:
+        """Median percentiles of the latest latency measurements, if any."""
+        rows = self._connection.execute(
+            'SELECT p50, p95, p99 FROM latency WHERE asset = ? AND service = ? '
+            'AND name = ? AND run_id IS NOT ? ORDER BY recorded_at DESC LIMIT ?',
+            (asset, service, name, exclude_run, window),
+        ).fetchall()
+        if not rows:
+            return None
+        return {
+            'p50': statistics.median(row[0] for row in rows),
+            'p95': statistics.median(row[1] for row in rows),
+            'p99': statistics.median(row[2] for row in rows),
+        }
+
+    def asset_timings(self, window: int = DEFAULT_WINDOW) -> dict[str, AssetTimings]:
+        """Median launch and total test durations, and failure rate, by marker."""
+        timings: dict[str, AssetTimings] = {}
+        markers = self._connection.execute(
+            "SELECT DISTINCT marker FROM asset_phase WHERE phase = 'launch'"
+        )
+        for (marker,) in markers.fetchall():
+            launches = self.asset_phase_durations(marker, 'launch', window)
+            runs = self._connection.execute(
+                'SELECT SUM(duration), MAX(outcome = \'failed\') FROM test '
+                'WHERE marker = ? GROUP BY run_id ORDER BY MAX(recorded_at) DESC '
+                'LIMIT ?',
+                (marker, window),
+            ).fetchall()
+            timings[marker] = {
+                'launch': statistics.median(launches),
+                'tests': statistics.median(total for total, _ in runs) if runs else 0,
+                'failure_rate': (
+                    sum(failed for _, failed in runs) / len(runs) if runs else 0
+                ),
+            }
+        return timings
+
+    def regressions(
+        self,
+        run_id: str,
+        window: int = DEFAULT_WINDOW,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[Regression]:
+        """Durations of ``run_id`` above ``threshold`` times their rolling median."""
+        regressions: list[Regression] = []
+        phases = self._connection.execute(
+            'SELECT marker, phase, duration FROM asset_phase WHERE run_id = ?',
+            (run_id,),
+        )
+        for marker, phase, duration in phases.fetchall():
+            previous = self.asset_phase_durations(marker, phase, window, run_id)
+            regression = _regression(
+                marker, phase, duration, previous, threshold, MIN_REGRESSION
+            )
+            if regression:
+                regressions.append(regression)
+
+        tests = self._connection.execute(
+            "SELECT test_id, duration FROM test WHERE run_id = ? AND outcome = 'passed'",
+            (run_id,),
+        )
+        for test_id, duration in tests.fetchall():
+            previous = self.test_durations(test_id, window, run_id)
+            regression = _regression(
+                test_id, 'test', duration, previous, threshold, MIN_REGRESSION
+            )
+            if regression:
+                regressions.append(regression)
+
+        latencies = self._connection.execute(
+            'SELECT asset, service, name, p95 FROM latency WHERE run_id = ?',
+            (run_id,),
+        )
+        for asset, service, name, p95 in latencies.fetchall():
+            baseline = self.latency_baseline(asset, service, name, window, run_id)
+            regression = _regression(
+                f'{service} ({asset}) {name}',
+                'p95',
+                p95,
+                [baseline['p95']] if baseline else [],
+                threshold,
+                MIN_LATENCY_REGRESSION,
+            )
+            if regression:
+                regressions.append(regression)
+        return regressions
+
+
+def _regression(
+    key: str,
+    phase: str,
+    duration: float,
+    previous: list[float],
+    threshold: float,
+    minimum: float,
+) -> Regression | None:
+    if not previous:
+        return None
+    median = statistics.median(previous)
+    if duration > median * threshold and duration - median >= minimum:
+        return {'key': key, 'phase': phase, 'duration': duration, 'median': median}
+    return None
+
+
+def git_revision(directory: str | Path) -> str:
+    try:
+        completed_process = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=directory,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return 'unknown'
+    return completed_process.stdout.strip() or 'unknown'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Show recorded asset timings')
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW)
+    args = parser.parse_args()
+
+    history = TimingHistory(args.path)
+    print(f'{"asset":<40} {"launch":>9} {"tests":>9} {"failures":>9}')
+    for marker, timings in sorted(history.asset_timings(args.window).items()):
+        print(
+            f'{marker:<40} {timings["launch"]:>8.1f}s {timings["tests"]:>8.1f}s '
+            f'{timings["failure_rate"]:>9.0%}'
+        )
+    history.close()
+
+
+if __name__ == '__main__':
+    main()
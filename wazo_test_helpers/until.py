@@ -1,38 +1,275 @@
-# Copyright 2015-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2015-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import logging
+import os
+import random
+import sys
+import threading
 import time
-from collections.abc import Callable, Generator
-from functools import partial
-from typing import Any, TypeVar
+import weakref
+from abc import ABCMeta, abstractmethod
+from collections.abc import Callable, Generator, Iterator
+from functools import partial, wraps
+from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar
+
+from . import _waits
+from ._waits import (  # noqa: F401 (public API)
+    WaitStats,
+    deadline,
+    enable_telemetry,
+    remaining_budget,
+    reset_telemetry,
+    telemetry,
+    telemetry_enabled,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
 logger = logging.getLogger(__name__)
 
 R = TypeVar('R')
+P = ParamSpec('P')
 
 
 class NoMoreTries(Exception):
     pass
 
 
-def tries_executions(tries: int, interval: int) -> Generator[None, None, None]:
-    for _ in range(tries):
+class PollingPolicy(metaclass=ABCMeta):
+    """Delays between two runs of the function polled by `until`.
+
+    - jitter: randomly spread each delay by up to this fraction of it, so that
+      concurrent waits do not poll in lockstep (default: 0)
+    """
+
+    def __init__(self, jitter: float = 0) -> None:
+        self.jitter = jitter
+
+    def delays(self, interval: float) -> Iterator[float]:
+        for delay in self._delays(interval):
+            if self.jitter:
+                delay *= 1 + random.uniform(-self.jitter, self.jitter)
+            yield delay
+
+    @abstractmethod
+    def _delays(self, interval: float) -> Iterator[float]:
+        pass
+
+
+class FixedInterval(PollingPolicy):
+    """Wait <interval> seconds between two runs."""
+
+    def _delays(self, interval: float) -> Iterator[float]:
+        while True:
+            yield interval
+
+
+class ExponentialBackoff(PollingPolicy):
+    """Start polling fast, then double the delay up to <interval> seconds.
+
+    Conditions becoming true shortly after the first run are detected within
+    milliseconds, without polling faster than every <interval> afterwards.
+
+    - initial: the first delay in seconds (default: 0.01)
+    - factor: the multiplier of the delay after each run (default: 2)
+    - maximum: the longest delay in seconds (default: <interval>)
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.01,
+        factor: float = 2,
+        maximum: float | None = None,
+        jitter: float = 0,
+    ) -> None:
+        super().__init__(jitter)
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+
+    def _delays(self, interval: float) -> Iterator[float]:
+        maximum = interval if self.maximum is None else self.maximum
+        delay = min(self.initial, maximum)
+        while True:
+            yield delay
+            delay = min(delay * self.factor, maximum)
+
+
+POLICIES: dict[str, Callable[[], PollingPolicy]] = {
+    'fixed': FixedInterval,
+    'backoff': ExponentialBackoff,
+}
+_default_policy: PollingPolicy | None = None
+
+
+def set_default_policy(policy: PollingPolicy | None) -> None:
+    """Set the policy used when a call passes none (``None``: from the environment)."""
+    global _default_policy
+    _default_policy = policy
+
+
+def default_policy() -> PollingPolicy:
+    """Return the policy set by `set_default_policy`, or WAZO_TEST_UNTIL_POLICY's."""
+    if _default_policy is not None:
+        return _default_policy
+    name = os.getenv('WAZO_TEST_UNTIL_POLICY', 'fixed')
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(f'Unknown polling policy: {name}') from None
+
+
+class Notifier:
+    """Wake up the `until` waits it is passed to when the awaited thing may be ready.
+
+    Between two runs, the polled function is run again as soon as `notify` is
+    called, instead of after the policy's delay, which remains the longest
+    time between runs. `notify` accepts any arguments, to be registered as a
+    callback, e.g. of a consumer receiving bus messages:
+
+        notifier = until.Notifier()
+        consumer.callbacks.append(notifier.notify)
+        until.assert_(message_received, timeout=5, notifier=notifier)
+
+    - condition: the threading.Condition to wait on (default: a new one); its
+      `notify_all` only wakes up the waits in progress: notifications between
+      two runs of the polled function are missed unless made with `notify`
+    """
+
+    def __init__(self, condition: threading.Condition | None = None) -> None:
+        self.condition = condition or threading.Condition()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def notify(self, *args: Any, **kwargs: Any) -> None:
+        with self.condition:
+            self._generation += 1
+            self.condition.notify_all()
+
+    def wait(self, timeout: float, generation: int) -> None:
+        """Wait <timeout> seconds, unless notified since <generation>."""
+        with self.condition:
+            if self._generation == generation:
+                self.condition.wait(timeout)
+
+
+NotifierLike = Notifier | threading.Condition | Callable[[Callable[..., None]], Any]
+
+
+# The Notifier of each threading.Condition in use, by id: the Notifier keeps its
+# condition alive, hence the id valid
+_condition_notifiers: weakref.WeakValueDictionary[
+    int, Notifier
+] = weakref.WeakValueDictionary()
+_condition_notifiers_lock = threading.Lock()
+
+
+def as_notifier(notifier: NotifierLike | None) -> Notifier | None:
+    """Accept a Notifier, a threading.Condition or a callback registration function.
+
+    A threading.Condition gets a single Notifier, shared by all the waits on
+    it: notify it with `as_notifier(condition).notify()` rather than
+    `condition.notify_all()`, which misses the waits between two runs of
+    their polled function. A registration function is called with a new
+    callback on each wait: register a Notifier once instead for repeated
+    waits.
+    """
+    if notifier is None or isinstance(notifier, Notifier):
+        return notifier
+    if isinstance(notifier, threading.Condition):
+        with _condition_notifiers_lock:
+            result = _condition_notifiers.get(id(notifier))
+            if result is None:
+                result = _condition_notifiers[id(notifier)] = Notifier(notifier)
+        return result
+    result = Notifier()
+    notifier(result.notify)
+    return result
+
+
+def tries_executions(
+    tries: int,
+    interval: float,
+    policy: PollingPolicy | None = None,
+    notifier: Notifier | None = None,
+) -> Generator[None, None, None]:
+    delays = _waits.lazy_delays(policy, interval)
+    generation = notifier.generation if notifier else 0
+    for try_ in range(tries):
+        if try_:
+            delay = next(delays)
+            budget = remaining_budget()
+            if budget is not None:
+                if budget <= 0:
+                    return
+                delay = min(delay, budget)
+            _sleep(delay, notifier, generation)
+            generation = notifier.generation if notifier else 0
+        if _waits.recording:
+            _waits.count_attempt()
         yield
-        time.sleep(interval)
 
 
-def timeout_executions(timeout: int, interval: int) -> Generator[None, None, None]:
-    end_time = time.time() + timeout
-    while time.time() < end_time:
+def timeout_executions(
+    timeout: float,
+    interval: float,
+    policy: PollingPolicy | None = None,
+    notifier: Notifier | None = None,
+) -> Generator[None, None, None]:
+    """Yield until <timeout> expires, sleeping between runs as <policy> says.
+
+    A delay running past the deadline is shortened so the last run happens at
+    the deadline. A <notifier> cuts the delays short. The budget of an
+    enclosing `deadline` shortens <timeout>.
+    """
+    delays = _waits.lazy_delays(policy, interval)
+    end_time = time.monotonic() + timeout
+    budget = remaining_budget()
+    if budget is not None:
+        end_time = min(end_time, time.monotonic() + budget)
+    while True:
+        # before the run, not to miss a notification arriving during it
+        generation = notifier.generation if notifier else 0
+        if _waits.recording:
+            _waits.count_attempt()
         yield
-        time_left = end_time - time.time()
-        delay = time_left % interval
+        time_left = end_time - time.monotonic()
+        if time_left <= 0:
+            return
+        _sleep(min(next(delays), time_left), notifier, generation)
+
+
+def _sleep(delay: float, notifier: Notifier | None, generation: int) -> None:
+    start = time.monotonic()
+    if notifier is None:
         time.sleep(delay)
+    else:
+        notifier.wait(delay, generation)
+    if _waits.recording:
+        _waits.count_sleeping(time.monotonic() - start)
+
+
+def _instrumented(func: Callable[P, R]) -> Callable[P, R]:
+    """Record the waits of <func> by call site, when telemetry is enabled."""
+
+    @wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        if not _waits.recording:
+            return func(*args, **kwargs)
+        with _waits.recorded_wait(sys._getframe(1), (AssertionError, NoMoreTries)):
+            return func(*args, **kwargs)
 
+    return wrapper
 
+
+@_instrumented
 def assert_(assert_function: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
     """Run <assert_function> <tries> times, spaced with <interval> seconds. Stops
     when <function> does not throw AssertionError.
@@ -47,18 +284,23 @@ def assert_(assert_function: Callable[..., Any], *args: Any, **kwargs: Any) -> N
         - timeout: the amount of seconds to try running <function>. Overrides `tries`.
         - tries: the number of times to run <function> (default: 1). Overriden by `timeout`.
         - interval: the seconds between 2 tries (default: 1)
+        - policy: the PollingPolicy spacing the tries (default: `default_policy()`)
+        - notifier: a Notifier, threading.Condition or callback registration
+          function, to try again as soon as notified (see `Notifier`)
     """
 
     message = kwargs.pop('message', None)
     tries = kwargs.pop('tries', 1)
     timeout = kwargs.pop('timeout', None)
     interval = kwargs.pop('interval', 1)
+    policy = kwargs.pop('policy', None)
+    notifier = as_notifier(kwargs.pop('notifier', None))
     errors: list[str] = []
 
     if timeout:
-        executions = partial(timeout_executions, timeout, interval)
+        executions = partial(timeout_executions, timeout, interval, policy, notifier)
     else:
-        executions = partial(tries_executions, tries, interval)
+        executions = partial(tries_executions, tries, interval, policy, notifier)
 
     for _ in executions():
         try:
@@ -68,11 +310,13 @@ def assert_(assert_function: Callable[..., Any], *args: Any, **kwargs: Any) -> N
             errors.append(str(e))
     else:
         error_message = '\n'.join(errors)
+        message = _waits.budget_message(message)
         if message:
             error_message = message + '\n' + error_message
         raise AssertionError(error_message)
 
 
+@_instrumented
 def true(function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
     """Run <function> <tries> times, spaced with 1 second. Stops when <function>
     returns an object evaluating to True, and returns it.
@@ -87,26 +331,32 @@ def true(function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
         - timeout: the amount of seconds to try running <function>. Overrides `tries`.
         - tries: the number of times to run <function> (default: 1). Overriden by `timeout`.
         - interval: the seconds between 2 tries (default: 1)
+        - policy: the PollingPolicy spacing the tries (default: `default_policy()`)
+        - notifier: a Notifier, threading.Condition or callback registration
+          function, to try again as soon as notified (see `Notifier`)
     """
 
     message = kwargs.pop('message', None)
     timeout = kwargs.pop('timeout', None)
     tries = kwargs.pop('tries', 1)
     interval = kwargs.pop('interval', 1)
+    policy = kwargs.pop('policy', None)
+    notifier = as_notifier(kwargs.pop('notifier', None))
 
     if timeout:
-        executions = partial(timeout_executions, timeout, interval)
+        executions = partial(timeout_executions, timeout, interval, policy, notifier)
     else:
-        executions = partial(tries_executions, tries, interval)
+        executions = partial(tries_executions, tries, interval, policy, notifier)
 
     for _ in executions():
         return_value = function(*args, **kwargs)
         if return_value:
             return return_value
     else:
-        raise NoMoreTries(message)
+        raise NoMoreTries(_waits.budget_message(message))
 
 
+@_instrumented
 def false(function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
     """Run <function> <tries> times, spaced with <interval> seconds. Stops when
     <function> returns an object evaluating to False, and returns it.
@@ -121,6 +371,9 @@ def false(function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
         - timeout: the amount of seconds to try running <function>. Overrides `tries`.
         - tries: the number of times to run <function> (default: 1). Overriden by `timeout`.
         - interval: the seconds between 2 tries (default: 1)
+        - policy: the PollingPolicy spacing the tries (default: `default_policy()`)
+        - notifier: a Notifier, threading.Condition or callback registration
+          function, to try again as soon as notified (see `Notifier`)
 
     """
 
@@ -128,20 +381,23 @@ def false(function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
     timeout = kwargs.pop('timeout', None)
     tries = kwargs.pop('tries', 1)
     interval = kwargs.pop('interval', 1)
+    policy = kwargs.pop('policy', None)
+    notifier = as_notifier(kwargs.pop('notifier', None))
 
     if timeout:
-        executions = partial(timeout_executions, timeout, interval)
+        executions = partial(timeout_executions, timeout, interval, policy, notifier)
     else:
-        executions = partial(tries_executions, tries, interval)
+        executions = partial(tries_executions, tries, interval, policy, notifier)
 
     for _ in executions():
         return_value = function(*args, **kwargs)
         if not return_value:
             return return_value
     else:
-        raise NoMoreTries(message)
+        raise NoMoreTries(_waits.budget_message(message))
 
 
+@_instrumented
 def return_(function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
     """Periodically run <function> for <timeout> seconds, spaced with <interval>
     seconds. Stops when <function> returns something, then return this value.
@@ -155,21 +411,151 @@ def return_(function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
           after <timeout> seconds
         - timeout: the amount of seconds to try running <function>.
         - interval: the seconds between 2 runs of <function> (default: 1)
+        - policy: the PollingPolicy spacing the runs (default: `default_policy()`)
+        - notifier: a Notifier, threading.Condition or callback registration
+          function, to run again as soon as notified (see `Notifier`)
 
     """
 
     timeout = kwargs.pop('timeout')
     interval = kwargs.pop('interval', 1)
+    policy = kwargs.pop('policy', None)
+    notifier = as_notifier(kwargs.pop('notifier', None))
     message = kwargs.pop('message', None)
     errors: list[str] = []
 
-    for _ in timeout_executions(timeout, interval):
+    for _ in timeout_executions(timeout, interval, policy, notifier):
         try:
             return function(*args, **kwargs)
         except Exception as e:
             errors.append(str(e))
     else:
         error_message = '\n'.join(errors)
+        message = _waits.budget_message(message)
         if message:
             error_message = message + '\n' + error_message
         raise NoMoreTries(error_message)
+
+
+class ConditionsNotMet(AssertionError):
+    """Raised by `all_` and `any_` with the conditions which were never met."""
+
+    def __init__(
+        self, message: str | None, pending: list[Callable[[], Any]], errors: list[str]
+    ) -> None:
+        lines = [message] if message else []
+        lines.extend(
+            f'{_name(condition)}: {error}' for condition, error in zip(pending, errors)
+        )
+        super().__init__('\n'.join(lines))
+        self.pending = pending
+
+
+@_instrumented
+def all_(*conditions: Callable[[], Any], **kwargs: Any) -> list[Any]:
+    """Run <conditions> in a single loop until they are all met, and return what
+    they returned, in order.
+
+    A condition is met when it does not raise AssertionError and does not return
+    a false value other than None: it is either an assert function or a function
+    detecting an event. Met conditions are not run again.
+
+    Useful for waiting for several independent events at once, instead of one
+    after the other.
+
+    Arguments:
+
+        - conditions: functions without arguments
+        - message: the message raised, with the conditions never met, if they
+          are not all met after <tries> times
+        - timeout: the amount of seconds to try running <conditions>. Overrides `tries`.
+        - tries: the number of times to run <conditions> (default: 1). Overriden by `timeout`.
+        - interval: the seconds between 2 tries (default: 1)
+        - policy: the PollingPolicy spacing the tries (default: `default_policy()`)
+        - notifier: a Notifier, threading.Condition or callback registration
+          function, to try again as soon as notified (see `Notifier`)
+        - max_workers: the number of conditions run concurrently, e.g. when
+          they make requests (default: 1)
+
+    Raises ConditionsNotMet, whose `pending` are the conditions never met.
+    """
+    results = _wait_conditions(conditions, 'all', **kwargs)
+    return [results[index] for index in range(len(conditions))]
+
+
+@_instrumented
+def any_(*conditions: Callable[[], Any], **kwargs: Any) -> dict[Callable[[], Any], Any]:
+    """Run <conditions> in a single loop until one of them is met, and return
+    what the conditions met in that try returned, by condition.
+
+    Accepts the same arguments as `all_`.
+    """
+    results = _wait_conditions(conditions, 'any', **kwargs)
+    return {conditions[index]: result for index, result in results.items()}
+
+
+def _wait_conditions(
+    conditions: tuple[Callable[[], Any], ...], mode: str, **kwargs: Any
+) -> dict[int, Any]:
+    message = kwargs.pop('message', None)
+    timeout = kwargs.pop('timeout', None)
+    tries = kwargs.pop('tries', 1)
+    interval = kwargs.pop('interval', 1)
+    policy = kwargs.pop('policy', None)
+    notifier = as_notifier(kwargs.pop('notifier', None))
+    max_workers = kwargs.pop('max_workers', 1)
+    if kwargs:
+        raise TypeError(f'Unexpected arguments: {", ".join(kwargs)}')
+
+    if timeout:
+        executions = partial(timeout_executions, timeout, interval, policy, notifier)
+    else:
+        executions = partial(tries_executions, tries, interval, policy, notifier)
+
+    results: dict[int, Any] = {}
+    errors: dict[int, str] = {}
+    pending = list(range(len(conditions)))
+    executor: Executor | None = None
+    if max_workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers)
+    try:
+        for _ in executions():
+            if executor:
+                outcomes = list(
+                    executor.map(lambda i: _run_condition(conditions[i]), pending)
+                )
+            else:
+                outcomes = [_run_condition(conditions[index]) for index in pending]
+            for index, (met, value) in zip(list(pending), outcomes):
+                if met:
+                    results[index] = value
+                    pending.remove(index)
+                else:
+                    errors[index] = value
+            if not pending or (mode == 'any' and results):
+                return results
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
+    raise ConditionsNotMet(
+        _waits.budget_message(message),
+        [conditions[index] for index in pending],
+        [errors[index] for index in pending],
+    )
+
+
+def _run_condition(condition: Callable[[], Any]) -> tuple[bool, Any]:
+    """Return whether <condition> is met, and its return value or error."""
+    try:
+        value = condition()
+    except AssertionError as e:
+        return False, str(e) or 'AssertionError'
+    if value is not None and not value:
+        return False, f'returned {value!r}'
+    return True, value
+
+
+def _name(function: Callable[..., Any]) -> str:
+    return getattr(function, '__qualname__', None) or repr(function)
@@ -5,10 +5,15 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 from collections.abc import Callable
-
-import requests
+from typing import TYPE_CHECKING
 
 from . import until
+from ._lazy import lazy_import
+
+if TYPE_CHECKING:
+    import requests
+else:
+    requests = lazy_import('requests')
 
 DEFAULT_TIMEOUT = 10
 
@@ -0,0 +1,105 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from ._lazy import lazy_import
+
+if TYPE_CHECKING:
+    import docker as docker_client
+else:
+    docker_client = lazy_import('docker')
+
+logger = logging.getLogger(__name__)
+
+
+class ContainerCrash(TypedDict):
+    service: str
+    exit_code: int | None
+    oom_killed: bool
+
+
+class ContainerWatchdog:
+    """Record unexpected deaths of a docker compose project's containers.
+
+    A background thread follows the `die` and `oom` Docker events of the
+    `services` of `project_name` until `stop` is called.
+    """
+
+    def __init__(self, project_name: str, services: list[str]) -> None:
+        self._project_name = project_name
+        self._services = services
+        self._crashes: dict[str, ContainerCrash] = {}
+        self._expected_stops: set[str] = set()
+        self._lock = threading.Lock()
+        self._events: Any = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        client = docker_client.from_env()
+        self._events = client.events(
+            decode=True,
+            filters={
+                'type': 'container',
+                'event': ['die', 'oom'],
+                'label': f'com.docker.compose.project={self._project_name}',
+            },
+        )
+        self._thread = threading.Thread(
+            target=self._watch,
+            name=f'watchdog-{self._project_name}',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._events is not None:
+            self._events.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def expect_stop(self, container_id: str) -> None:
+        with self._lock:
+            self._expected_stops.add(container_id)
+
+    def forget(self, container_id: str) -> None:
+        with self._lock:
+            self._expected_stops.discard(container_id)
+            self._crashes.pop(container_id, None)
+
+    def crashes(self) -> dict[str, ContainerCrash]:
+        with self._lock:
+            return dict(self._crashes)
+
+    def _watch(self) -> None:
+        try:
+            for event in self._events:
+                self._on_event(event)
+        except Exception as e:
+            # closing the stream interrupts the iteration
+            logger.debug('Watchdog of %s stopped: %s', self._project_name, e)
+
+    def _on_event(self, event: dict) -> None:
+        attributes = event.get('Actor', {}).get('Attributes', {})
+        service = attributes.get('com.docker.compose.service')
+        if service not in self._services:
+            return
+        container_id = event.get('id') or event['Actor']['ID']
+        with self._lock:
+            if container_id in self._expected_stops:
+                return
+            crash = self._crashes.setdefault(
+                container_id,
+                {'service': service, 'exit_code': None, 'oom_killed': False},
+            )
+            if event.get('Action') == 'oom':
+                crash['oom_killed'] = True
+            elif 'exitCode' in attributes:
+                crash['exit_code'] = int(attributes['exitCode'])
+        logger.warning(
+            'Container %s of service %s died: %s', container_id, service, crash
+        )